@@ -12,7 +12,7 @@ import uuid
 
 from orchestrator.graph import build_policy_graph
 from utils.logging import setup_logger, log_request
-from utils.tracing import create_trace_context
+from utils.tracing import create_trace_context, to_json
 from config import load_config
 
 # Initialize
@@ -135,7 +135,7 @@ async def answer_query(request: QueryRequest, background_tasks: BackgroundTasks)
         )
         
         # Log async
-        background_tasks.add_task(log_request, request_id, request.query, response, trace_ctx)
+        background_tasks.add_task(log_request, request_id, request.query, response, to_json(trace_ctx))
         
         logger.info(f"✅ Request {request_id} completed in {processing_ms}ms")
         return response
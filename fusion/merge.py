@@ -59,6 +59,51 @@ def merge_and_trim(
     return final_docs
 
 
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Dict[str, Any]]],
+    top_k: int = 20,
+    k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked document lists (e.g. dense + sparse) with Reciprocal Rank Fusion
+    
+    score(doc) = sum over lists of 1 / (k + best rank of doc in that list).
+    Documents are identified by source URI plus chunk text, so different chunks
+    of the same file stay separate while copies of one chunk from different
+    lists are merged, keeping the best-ranked copy
+    """
+    fused = {}
+    
+    for list_index, docs in enumerate(ranked_lists):
+        for rank, doc in enumerate(docs):
+            if doc.get("source_uri") or doc.get("text"):
+                key = (doc.get("source_uri"), doc.get("text"))
+            else:
+                key = (list_index, doc.get("id", rank))
+            
+            if key not in fused:
+                fused[key] = {"doc": doc, "rrf_score": 0.0, "best_rank": rank, "lists": set()}
+            elif rank < fused[key]["best_rank"]:
+                fused[key]["doc"] = doc
+                fused[key]["best_rank"] = rank
+            
+            # Lists are walked in rank order, so the first sighting is the best rank
+            if list_index not in fused[key]["lists"]:
+                fused[key]["lists"].add(list_index)
+                fused[key]["rrf_score"] += 1.0 / (k + rank + 1)
+    
+    ranked = sorted(fused.values(), key=lambda f: f["rrf_score"], reverse=True)[:top_k]
+    
+    results = []
+    for rank, entry in enumerate(ranked):
+        doc = entry["doc"].copy()
+        doc["rrf_score"] = entry["rrf_score"]
+        doc["rank"] = rank
+        results.append(doc)
+    
+    return results
+
+
 def ensure_vertical_coverage(
     documents: List[Dict[str, Any]],
     min_per_vertical: int = 1
@@ -0,0 +1,204 @@
+"""
+Enhancement Cache - Two-tier cache for LLM query enhancements
+Exact matches are persisted to disk; near-duplicate queries hit a semantic tier
+"""
+from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+
+from vertexai.language_models import TextEmbeddingModel
+
+from utils.logging import get_logger
+from utils.semantic_cache import SemanticCache
+
+logger = get_logger()
+
+# Semantic hits are less certain than an enhancement made for the exact query
+CONFIDENCE_DOWNGRADE = {0.9: 0.7, 0.7: 0.5}
+
+
+def _copy_entry(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an enhancement result that shares no mutable containers with the cache"""
+    entry = dict(result)
+    if "search_terms" in entry:
+        entry["search_terms"] = list(entry["search_terms"])
+    return entry
+
+
+class EnhancementCache:
+    """
+    Caches enhancement results keyed on the full prompt inputs
+    
+    Tier 1 is an exact-match LRU of up to max_entries, persisted as JSON at most
+    once per flush_interval seconds and at exit. Tier 2 (optional) looks up the
+    query embedding in a SemanticCache scoped to the remaining prompt inputs,
+    and downgrades the cached confidence by one level on a hit.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        embedding_model: Any = None,
+        max_entries: int = 10000,
+        flush_interval: float = 30.0
+    ):
+        self.path = path
+        self.semantic_cache = semantic_cache
+        self.embedding_model = embedding_model
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        
+        if path is not None and path.exists():
+            try:
+                with open(path, "r") as f:
+                    self._entries = OrderedDict(json.load(f))
+                self._evict()
+                logger.info(f"Loaded {len(self._entries)} cached enhancements from {path}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load enhancement cache {path}: {e}")
+        
+        if path is not None:
+            # Writes are batched, so whatever is still pending goes out at exit
+            atexit.register(self.flush)
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["EnhancementCache"]:
+        """
+        Build the cache from the `enhancement_cache` config section
+        
+        Returns None when caching is disabled
+        """
+        cache_config = config.get("enhancement_cache", {})
+        
+        if not cache_config.get("enabled"):
+            return None
+        
+        path = cache_config.get("path")
+        path = Path(os.path.expanduser(path)) if path else None
+        
+        semantic_cache = None
+        embedding_model = None
+        if cache_config.get("semantic"):
+            semantic_cache = SemanticCache(
+                threshold=cache_config.get("similarity_threshold", 0.90),
+                max_entries=cache_config.get("max_entries", 10000),
+                ttl_seconds=config.get("performance", {}).get("cache_ttl_seconds", 3600)
+            )
+            embedding_model = TextEmbeddingModel.from_pretrained(
+                config["models"].get("embed", "text-embedding-005")
+            )
+        
+        return cls(
+            path,
+            semantic_cache,
+            embedding_model,
+            max_entries=cache_config.get("max_entries", 10000),
+            flush_interval=cache_config.get("flush_interval_seconds", 30.0)
+        )
+    
+    @staticmethod
+    def make_key(query: str, scope: str) -> str:
+        """Exact-match key: the query plus the other prompt inputs"""
+        return json.dumps([query, scope])
+    
+    async def lookup(
+        self,
+        query: str,
+        scope: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Look up a cached enhancement
+        
+        Returns:
+            Tuple of (cached result or None, query embedding if one was computed)
+        """
+        key = self.make_key(query, scope)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return _copy_entry(cached), None
+        
+        if self.semantic_cache is None:
+            return None, None
+        
+        embedding = await self._embed(query)
+        if embedding is None:
+            return None, None
+        
+        cached = self.semantic_cache.get(embedding, scope=scope)
+        if cached is None:
+            return None, embedding
+        
+        result = _copy_entry(cached)
+        result["confidence"] = CONFIDENCE_DOWNGRADE.get(result["confidence"], result["confidence"])
+        return result, embedding
+    
+    async def store(
+        self,
+        query: str,
+        scope: str,
+        result: Dict[str, Any],
+        embedding: Optional[List[float]] = None
+    ) -> None:
+        """Cache an enhancement in both tiers; the exact tier is persisted in batches"""
+        key = self.make_key(query, scope)
+        self._entries[key] = _copy_entry(result)
+        self._entries.move_to_end(key)
+        self._evict()
+        
+        if self.semantic_cache is not None and embedding is not None:
+            self.semantic_cache.put(embedding, _copy_entry(result), scope=scope)
+        
+        if self.path is None:
+            return
+        
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.flush_interval:
+            # Snapshot on the event loop thread, write in the background
+            self._dirty = False
+            self._last_save = time.monotonic()
+            await asyncio.to_thread(self._save, dict(self._entries))
+    
+    def flush(self) -> None:
+        """Write pending exact-tier entries now (registered with atexit)"""
+        if self.path is not None and self._dirty:
+            self._dirty = False
+            self._last_save = time.monotonic()
+            self._save(dict(self._entries))
+    
+    def _evict(self) -> None:
+        """Drop least recently used exact-tier entries beyond max_entries"""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Write the exact tier atomically (temp file + rename)"""
+        try:
+            with self._save_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist enhancement cache: {e}")
+    
+    async def _embed(self, query: str) -> Optional[List[float]]:
+        """Embed a query for the semantic tier, None if embedding fails"""
+        try:
+            results = await asyncio.to_thread(self.embedding_model.get_embeddings, [query])
+            return results[0].values
+        except Exception as e:
+            logger.warning(f"Enhancement cache embedding failed: {e}")
+            return None
@@ -2,18 +2,43 @@
 LLM-powered Query Enhancement for RAG Retrieval
 Optimizes queries using Gemini to improve document retrieval
 """
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
+import json
+import re
 import vertexai
 from vertexai.generative_models import GenerativeModel
 import asyncio
 from utils.logging import get_logger
+from llm.enhancement_cache import EnhancementCache
 
 logger = get_logger()
 
+# One pass over the LLM response picks up every labelled field
+_RESPONSE_PATTERN = re.compile(
+    r'^[ \t]*(?:ENHANCED QUERY:(?P<enhanced_query>.*)|SEARCH TERMS:(?P<search_terms>.*)'
+    r'|REASONING:(?P<reasoning>.*)|CONFIDENCE:(?P<confidence>.*))',
+    re.MULTILINE
+)
+
+# Shared by every enhancer instance (enhance_agent_query builds one per call)
+_enhancement_cache: Optional[EnhancementCache] = None
+_enhancement_cache_loaded = False
+
+
+def get_enhancement_cache(config: Dict[str, Any]) -> Optional[EnhancementCache]:
+    """Process-wide enhancement cache, None when disabled"""
+    global _enhancement_cache, _enhancement_cache_loaded
+    if not _enhancement_cache_loaded:
+        _enhancement_cache = EnhancementCache.from_config(config)
+        _enhancement_cache_loaded = True
+    return _enhancement_cache
+
 
 class LLMQueryEnhancer:
     """LLM-powered query enhancement for better RAG retrieval"""
     
+    __slots__ = ("config", "project_id", "location", "model_name", "model", "cache")
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.project_id = config["project"]["gcp_project_id"]
@@ -23,6 +48,7 @@ class LLMQueryEnhancer:
         # Initialize Vertex AI
         vertexai.init(project=self.project_id, location=self.location)
         self.model = GenerativeModel(self.model_name)
+        self.cache = get_enhancement_cache(config)
         
         logger.info(f"Initialized LLM Query Enhancer with {self.model_name}")
     
@@ -46,20 +72,27 @@ class LLMQueryEnhancer:
             Dict with enhanced query and reasoning
         """
         
+        # Everything besides the query that shapes the prompt scopes the cache entry
+        cache_scope = None
+        query_embedding = None
+        if self.cache is not None:
+            cache_scope = json.dumps(
+                [agent_type, parsed_query_info, corpus_context], sort_keys=True, default=str
+            )
+            cached, query_embedding = await self.cache.lookup(original_query, cache_scope)
+            if cached is not None:
+                logger.info(f"Enhancement cache hit for '{original_query[:30]}...'")
+                return cached
+        
         # Build enhancement prompt
         prompt = self._build_enhancement_prompt(
             original_query, agent_type, parsed_query_info, corpus_context
         )
         
         try:
-            # Get enhancement from LLM
-            loop = asyncio.get_event_loop()
-            
-            def sync_generate():
-                response = self.model.generate_content(prompt)
-                return response.text
-            
-            enhanced_response = await loop.run_in_executor(None, sync_generate)
+            # Get enhancement from LLM (blocking SDK call runs in a worker thread)
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            enhanced_response = response.text
             
             # Parse the response
             enhancement_result = self._parse_enhancement_response(enhanced_response)
@@ -69,6 +102,11 @@ class LLMQueryEnhancer:
                 f"'{enhancement_result['enhanced_query'][:50]}...'"
             )
             
+            if self.cache is not None:
+                await self.cache.store(
+                    original_query, cache_scope, enhancement_result, query_embedding
+                )
+            
             return enhancement_result
             
         except Exception as e:
@@ -153,7 +191,6 @@ CONFIDENCE: [High/Medium/Low confidence in this enhancement]"""
     def _parse_enhancement_response(self, response: str) -> Dict[str, Any]:
         """Parse the LLM enhancement response"""
         try:
-            lines = response.strip().split('\n')
             result = {
                 "enhanced_query": "",
                 "search_terms": [],
@@ -161,24 +198,22 @@ CONFIDENCE: [High/Medium/Low confidence in this enhancement]"""
                 "confidence": 0.5
             }
             
-            current_section = None
-            for line in lines:
-                line = line.strip()
-                if line.startswith("ENHANCED QUERY:"):
-                    result["enhanced_query"] = line.replace("ENHANCED QUERY:", "").strip()
-                elif line.startswith("SEARCH TERMS:"):
-                    terms = line.replace("SEARCH TERMS:", "").strip()
-                    result["search_terms"] = [t.strip() for t in terms.split(',') if t.strip()]
-                elif line.startswith("REASONING:"):
-                    result["reasoning"] = line.replace("REASONING:", "").strip()
-                elif line.startswith("CONFIDENCE:"):
-                    conf_text = line.replace("CONFIDENCE:", "").strip().lower()
+            for match in _RESPONSE_PATTERN.finditer(response):
+                field = match.lastgroup
+                value = match.group(field).strip()
+                
+                if field == "search_terms":
+                    result["search_terms"] = [t.strip() for t in value.split(',') if t.strip()]
+                elif field == "confidence":
+                    conf_text = value.lower()
                     if "high" in conf_text:
                         result["confidence"] = 0.9
                     elif "medium" in conf_text:
                         result["confidence"] = 0.7
                     else:
                         result["confidence"] = 0.5
+                else:
+                    result[field] = value
             
             # Fallback if parsing failed
             if not result["enhanced_query"]:
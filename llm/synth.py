@@ -2,14 +2,31 @@
 Synthesis - Generate grounded answers with citations using Gemini
 Enforces strict citation format and evidence-based reasoning
 """
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
+import time
 import vertexai
 from vertexai.generative_models import GenerativeModel, Part
 import re
-from utils.logging import get_logger
+from utils.logging import get_logger, log_performance_metrics
+from rag_clients.doc_cache import DocKVCache
 
 logger = get_logger()
 
+# Stands in for the documents in the prompt when they are served from the context cache
+CACHED_CONTEXT_NOTE = "(Provided above as cached context)"
+
+_doc_cache: Optional[DocKVCache] = None
+_doc_cache_loaded = False
+
+
+def get_doc_cache(config: Dict[str, Any]) -> Optional[DocKVCache]:
+    """Process-wide document context cache, None when disabled"""
+    global _doc_cache, _doc_cache_loaded
+    if not _doc_cache_loaded:
+        _doc_cache = DocKVCache.from_config(config)
+        _doc_cache_loaded = True
+    return _doc_cache
+
 
 async def synthesize_answer(
     query: str,
@@ -46,11 +63,26 @@ async def synthesize_answer(
     
     # Prepare context and prompt
     context = _build_context(documents, config)
-    prompt = _build_prompt(query, context, features, config)
-    
-    # Generate answer
     model_name = config["models"]["llm"]
-    model = GenerativeModel(model_name)
+    
+    # Shared documents are prefilled once into a Vertex context cache and reused
+    doc_cache = get_doc_cache(config)
+    cached_content = None
+    if doc_cache is not None:
+        start = time.perf_counter()
+        cached_content = await doc_cache.get_or_create(model_name, documents, context)
+        log_performance_metrics(
+            "synthesis_context_cache",
+            int((time.perf_counter() - start) * 1000),
+            {**doc_cache.stats(), "cached": cached_content is not None}
+        )
+    
+    if cached_content is not None:
+        prompt = _build_prompt(query, CACHED_CONTEXT_NOTE, features, config)
+        model = doc_cache.cached_model(cached_content)
+    else:
+        prompt = _build_prompt(query, context, features, config)
+        model = GenerativeModel(model_name)
     
     generation_config = {
         "temperature": config["models"].get("temperature", 0.1),
@@ -19,7 +19,7 @@ except ImportError:
         MemorySaver = None
 
 from orchestrator.state import PolicyGraphState, is_error_state
-from router.planner import QueryPlanner
+from router.planner import get_query_planner
 from rag_clients.vertex_rag import VertexRAGClient
 from fusion.dedupe import deduplicate_docs
 from fusion.rerank import rerank_docs
@@ -35,7 +35,7 @@ class PolicyGraphOrchestrator:
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.planner = QueryPlanner()
+        self.planner = get_query_planner()
         self.rag_client = VertexRAGClient(config)
         
         # Build the graph
@@ -158,7 +158,8 @@ class PolicyGraphOrchestrator:
                 task = self.rag_client.search(
                     engine_name=engine_name,
                     query=state["query"],
-                    config=engine_config
+                    config=engine_config,
+                    features=state.get("features")
                 )
                 tasks.append(task)
             
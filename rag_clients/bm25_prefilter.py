@@ -0,0 +1,148 @@
+"""
+BM25 Prefilter - Local sparse retrieval over a corpus metadata digest
+Answers ID-like queries (GO numbers, section citations) without a Vertex RAG round-trip
+"""
+from typing import Dict, List, Any, Optional, Tuple
+from pathlib import Path
+import json
+import re
+
+try:
+    from rank_bm25 import BM25Okapi
+    BM25_AVAILABLE = True
+except ImportError:
+    BM25_AVAILABLE = False
+    BM25Okapi = None
+
+from utils.logging import get_logger
+
+logger = get_logger()
+
+# Keep identifiers like "45/2023" and "g.o" together as single tokens
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[./\-][a-z0-9]+)*")
+
+# Digest entries without an "engine" field are shared by every engine
+SHARED_INDEX = "*"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into alphanumeric tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Prefilter:
+    """Per-engine BM25 indexes built from a JSON-lines corpus digest"""
+    
+    def __init__(self, entries: List[Dict[str, Any]], threshold: float = 10.0):
+        """
+        Args:
+            entries: Digest entries with engine, source_uri, title, text, metadata
+            threshold: Minimum top BM25 score to answer without Vertex RAG
+        """
+        if not BM25_AVAILABLE:
+            raise ImportError("rank_bm25 not available. Install it with `pip install rank-bm25`.")
+        
+        self.threshold = threshold
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        
+        for entry in entries:
+            engine = entry.get("engine", SHARED_INDEX)
+            self._entries.setdefault(engine, []).append(entry)
+        
+        self._indexes = {
+            engine: BM25Okapi([tokenize(self._entry_text(e)) for e in engine_entries])
+            for engine, engine_entries in self._entries.items()
+        }
+        
+        logger.info(
+            f"Initialized BM25 prefilter: {len(entries)} entries, "
+            f"indexes={list(self._indexes.keys())}"
+        )
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["BM25Prefilter"]:
+        """
+        Build the prefilter from the `sparse_retrieval` config section
+        
+        Returns None when sparse retrieval is disabled or unavailable
+        """
+        sparse_config = config.get("sparse_retrieval", {})
+        
+        if not sparse_config.get("enabled"):
+            return None
+        
+        if not BM25_AVAILABLE:
+            logger.warning("rank_bm25 not available, sparse retrieval disabled")
+            return None
+        
+        digest_path = Path(sparse_config.get("corpus_digest_path", "data/corpus_digest.jsonl"))
+        if not digest_path.is_absolute():
+            digest_path = Path(__file__).parent.parent / digest_path
+        
+        if not digest_path.exists():
+            logger.warning(f"Corpus digest not found at {digest_path}, sparse retrieval disabled")
+            return None
+        
+        with open(digest_path, "r") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        
+        return cls(entries, threshold=sparse_config.get("prefilter_threshold", 10.0))
+    
+    def search(
+        self,
+        query: str,
+        engine_name: str,
+        top_k: int
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """
+        Score the engine's digest entries against the query
+        
+        Returns:
+            Tuple of (documents in the standard retrieval format, top raw BM25 score)
+        """
+        engine = engine_name if engine_name in self._indexes else SHARED_INDEX
+        index = self._indexes.get(engine)
+        
+        if index is None:
+            return [], 0.0
+        
+        scores = index.get_scores(tokenize(query))
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
+        
+        if not ranked or scores[ranked[0]] <= 0:
+            return [], 0.0
+        
+        top_score = float(scores[ranked[0]])
+        entries = self._entries[engine]
+        
+        documents = []
+        for rank, i in enumerate(ranked):
+            if scores[i] <= 0:
+                break
+            
+            entry = entries[i]
+            metadata = entry.get("metadata", {})
+            locator = metadata.get("page", metadata.get("section", metadata.get("chunk_index", "")))
+            
+            documents.append({
+                "id": f"{engine_name}_{rank}",
+                "vertical": engine_name,
+                "source_uri": entry.get("source_uri", ""),
+                "text": entry.get("text", entry.get("title", "")),
+                "score": float(scores[i]) / top_score,  # Relative to the best match
+                "bm25_score": float(scores[i]),
+                "metadata": metadata,
+                "rank": rank,
+                "locator": str(locator) if locator else "",
+                "source_date": metadata.get("date", metadata.get("published_date", ""))
+            })
+        
+        return documents, top_score
+    
+    @staticmethod
+    def _entry_text(entry: Dict[str, Any]) -> str:
+        """Searchable text for a digest entry: title, text and metadata values"""
+        metadata = entry.get("metadata", {})
+        parts = [entry.get("title", ""), entry.get("text", "")]
+        parts.extend(str(v) for v in metadata.values())
+        return " ".join(parts)
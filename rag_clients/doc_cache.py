@@ -0,0 +1,164 @@
+"""
+Document KV Cache - Reuse Gemini prefill over retrieved documents
+Repeated synthesis over the same top-K documents points Gemini at a Vertex
+context cache (CachedContent) instead of re-sending and re-prefilling them
+"""
+from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
+from datetime import timedelta
+import asyncio
+import hashlib
+import time
+
+try:
+    # Preview CachedContent pairs with the preview GenerativeModel: the GA class
+    # lacks from_cached_content in SDK releases where caching is preview-only
+    from vertexai.preview.caching import CachedContent
+    from vertexai.preview.generative_models import GenerativeModel as PreviewGenerativeModel
+    CONTEXT_CACHE_AVAILABLE = True
+except ImportError:
+    CONTEXT_CACHE_AVAILABLE = False
+    CachedContent = None
+    PreviewGenerativeModel = None
+
+from utils.logging import get_logger
+
+logger = get_logger()
+
+# After a failed create, the same document set is sent inline for this long
+# instead of retrying the RPC on every request
+FAILURE_TTL_SECONDS = 60
+
+
+class DocKVCache:
+    """
+    LRU of Vertex CachedContent handles keyed on (document set, model)
+    
+    The KV states themselves live server-side in the Vertex context cache; this
+    class only remembers which cache holds which documents. Documents are
+    identified by source_uri plus a hash of the chunk text, so re-ranked or
+    re-fetched copies of the same chunk map to the same key.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 64,
+        ttl_seconds: int = 3600,
+        min_context_chars: int = 8000
+    ):
+        """
+        Args:
+            max_entries: Cached document sets remembered locally
+            ttl_seconds: Lifetime of each Vertex context cache
+            min_context_chars: Smaller contexts are sent inline (Vertex enforces
+                a minimum token count for cached content)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_context_chars = min_context_chars
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["DocKVCache"]:
+        """
+        Build the cache from the `synthesis.context_cache` config section
+        
+        Returns None when context caching is disabled or unavailable
+        """
+        cache_config = config.get("synthesis", {}).get("context_cache", {})
+        
+        if not cache_config.get("enabled"):
+            return None
+        
+        if not CONTEXT_CACHE_AVAILABLE:
+            logger.warning("vertexai.preview.caching not available, context cache disabled")
+            return None
+        
+        return cls(
+            max_entries=cache_config.get("max_entries", 64),
+            ttl_seconds=cache_config.get("ttl_seconds", 3600),
+            min_context_chars=cache_config.get("min_context_chars", 8000)
+        )
+    
+    @staticmethod
+    def doc_key(doc: Dict[str, Any]) -> str:
+        """Stable document identity: source_uri plus a hash of the chunk text"""
+        text_hash = hashlib.sha1(doc.get("text", "").encode("utf-8")).hexdigest()[:16]
+        return f"{doc.get('source_uri', doc.get('id', ''))}#{text_hash}"
+    
+    async def get_or_create(
+        self,
+        model_name: str,
+        documents: List[Dict[str, Any]],
+        context: str
+    ) -> Optional[Any]:
+        """
+        Return a CachedContent holding the documents' context
+        
+        Args:
+            model_name: Gemini model the cache is created for
+            documents: Documents the context was built from (defines the key)
+            context: Rendered context text to cache
+        
+        Returns:
+            CachedContent, or None if the context should be sent inline
+        """
+        if len(context) < self.min_context_chars:
+            return None
+        
+        key = ("|".join(self.doc_key(doc) for doc in documents), model_name)
+        
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.time():
+            self._entries.move_to_end(key)
+            if entry[0] is None:
+                # Recent creation failure for this document set
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+        
+        self.misses += 1
+        
+        try:
+            # Blocking RPC; keep it off the event loop
+            cached_content = await asyncio.to_thread(
+                CachedContent.create,
+                model_name=model_name,
+                contents=[context],
+                ttl=timedelta(seconds=self.ttl_seconds)
+            )
+        except Exception as e:
+            logger.warning(f"Context cache creation failed, sending documents inline: {e}")
+            self._store(key, None, FAILURE_TTL_SECONDS)
+            return None
+        
+        # Expire locally a little early so we never hand out a cache Vertex has dropped
+        self._store(key, cached_content, self.ttl_seconds * 0.9)
+        return cached_content
+    
+    def _store(self, key: Tuple[str, str], cached_content: Optional[Any], ttl: float) -> None:
+        """Remember a cache handle (or a failure, as None) and evict the least recently used"""
+        self._entries[key] = (cached_content, time.time() + ttl)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    @staticmethod
+    def cached_model(cached_content: Any) -> Any:
+        """Gemini model bound to a context cache returned by get_or_create"""
+        return PreviewGenerativeModel.from_cached_content(cached_content=cached_content)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "miss_rate": self.misses / lookups if lookups else 0.0
+        }
@@ -0,0 +1,38 @@
+"""
+Document - Typed record for a single retrieved context
+"""
+from typing import Dict, Any
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class Document:
+    """A retrieved context in the standardized document format"""
+    id: str
+    vertical: str
+    source_uri: str
+    text: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    rank: int = 0
+    locator: str = ""
+    source_date: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to the dict format used by fusion, agents and synthesis
+        
+        Downstream stages annotate documents with extra keys (rerank_score,
+        citation, ...), so the pipeline itself keeps working on dicts
+        """
+        return {
+            "id": self.id,
+            "vertical": self.vertical,
+            "source_uri": self.source_uri,
+            "text": self.text,
+            "score": self.score,
+            "metadata": self.metadata,
+            "rank": self.rank,
+            "locator": self.locator,
+            "source_date": self.source_date
+        }
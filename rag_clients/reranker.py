@@ -0,0 +1,138 @@
+"""
+ONNX Reranker - Local cross-encoder rerank of retrieved candidates
+Scores (query, passage) pairs with an exported cross-encoder such as bge-reranker-v2-m3
+"""
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    ort = None
+    Tokenizer = None
+
+from utils.logging import get_logger
+
+logger = get_logger()
+
+
+class OnnxReranker:
+    """Cross-encoder reranker running on onnxruntime (CUDA if available, else CPU)"""
+    
+    def __init__(
+        self,
+        model_path: Path,
+        tokenizer_path: Path,
+        max_length: int = 512,
+        batch_size: int = 16
+    ):
+        """
+        Args:
+            model_path: Exported ONNX cross-encoder
+            tokenizer_path: Matching Hugging Face tokenizer.json
+            max_length: Token limit per (query, passage) pair
+            batch_size: Pairs scored per inference call
+        """
+        if not ONNX_AVAILABLE:
+            raise ImportError(
+                "onnxruntime/tokenizers not available. "
+                "Install them with `pip install onnxruntime tokenizers`."
+            )
+        
+        providers = [
+            provider for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+            if provider in ort.get_available_providers()
+        ]
+        self.session = ort.InferenceSession(str(model_path), providers=providers)
+        self._input_names = {inp.name for inp in self.session.get_inputs()}
+        
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+        
+        logger.info(f"Initialized ONNX reranker: model={model_path}, providers={providers}")
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["OnnxReranker"]:
+        """
+        Build the reranker from the `search` config section
+        
+        Returns None when reranking is disabled or unavailable
+        """
+        search_config = config.get("search", {})
+        
+        if not search_config.get("rerank"):
+            return None
+        
+        if not ONNX_AVAILABLE:
+            logger.warning("onnxruntime/tokenizers not available, local rerank disabled")
+            return None
+        
+        root = Path(__file__).parent.parent
+        model_path = Path(search_config.get("reranker_model_path", "models/bge-reranker-v2-m3/model.onnx"))
+        tokenizer_path = Path(search_config.get("reranker_tokenizer_path", "models/bge-reranker-v2-m3/tokenizer.json"))
+        model_path = model_path if model_path.is_absolute() else root / model_path
+        tokenizer_path = tokenizer_path if tokenizer_path.is_absolute() else root / tokenizer_path
+        
+        if not model_path.exists() or not tokenizer_path.exists():
+            logger.warning(f"Reranker model not found at {model_path}, local rerank disabled")
+            return None
+        
+        return cls(
+            model_path,
+            tokenizer_path,
+            max_length=search_config.get("reranker_max_length", 512),
+            batch_size=search_config.get("reranker_batch_size", 16)
+        )
+    
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        """Relevance of each text to the query, as sigmoid probabilities"""
+        scores = []
+        
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(
+                [(query, text) for text in texts[start:start + self.batch_size]]
+            )
+            
+            feed = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            }
+            if "token_type_ids" in self._input_names:
+                feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            
+            logits = self.session.run(None, feed)[0].reshape(-1)
+            scores.extend((1.0 / (1.0 + np.exp(-logits))).tolist())
+        
+        return scores
+    
+    def rerank(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder documents by cross-encoder score and keep the top_k
+        
+        Documents are annotated with rerank_score and re-numbered by rank
+        """
+        if not documents:
+            return []
+        
+        scores = self.score_batch(query, [doc.get("text", "") for doc in documents])
+        order = np.argsort(scores)[::-1][:top_k]
+        
+        reranked = []
+        for rank, i in enumerate(order):
+            doc = documents[i]
+            doc["rerank_score"] = scores[i]
+            doc["rank"] = rank
+            reranked.append(doc)
+        
+        return reranked
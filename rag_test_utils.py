@@ -0,0 +1,15 @@
+"""
+RAG test utilities - Helpers shared by the test scripts and run_tests.py
+"""
+from functools import lru_cache
+import vertexai
+
+# Project the test scripts run against
+PROJECT_ID = "tech-bharath"
+LOCATION = "asia-south1"
+
+
+@lru_cache(maxsize=None)
+def vertex_ready(project: str = PROJECT_ID, location: str = LOCATION) -> None:
+    """Initialize the Vertex SDK once per (project, location), on first use"""
+    vertexai.init(project=project, location=location)
@@ -6,6 +6,94 @@ from typing import Dict, List, Tuple, Any
 import numpy as np
 from config import load_config, get_all_facets
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+
+# Entity types that signal relevance for each engine
+ENTITY_RELEVANCE = {
+    "legal": ["legal_refs", "case_citations"],
+    "judicial": ["case_citations", "legal_refs"],
+    "gos": ["go_numbers"],
+    "data_report": ["metrics"],
+    "schemes": ["schemes"]
+}
+
+# GOs and Data Reports are typically more time-sensitive
+RECENCY_BOOSTS = {"gos": 0.3, "data_report": 0.25, "schemes": 0.2}
+
+# Domain-specific scoring rules: (predicate(entities, query_type, query_lower), engine bonuses)
+SCORING_RULES = [
+    # Rule 1: Legal queries with sections/acts strongly favor legal + gos
+    (lambda entities, query_type, query_lower: bool(entities.get("legal_refs")),
+     {"legal": 0.3, "gos": 0.3}),
+    
+    # Rule 2: Transfer queries need legal + gos
+    (lambda entities, query_type, query_lower: "transfer" in query_lower,
+     {"legal": 0.25, "gos": 0.25}),
+    
+    # Rule 3: Case citations need judicial + legal
+    (lambda entities, query_type, query_lower: bool(entities.get("case_citations")),
+     {"judicial": 0.3, "legal": 0.3}),
+    
+    # Rule 4: Statistical queries need data_report
+    (lambda entities, query_type, query_lower: query_type == "statistical",
+     {"data_report": 0.25}),
+    
+    # Rule 5: GO numbers explicitly mentioned (strong signal for gos, supporting for legal)
+    (lambda entities, query_type, query_lower: bool(entities.get("go_numbers")),
+     {"gos": 0.4, "legal": 0.15}),
+    
+    # Rule 6: Scheme queries
+    (lambda entities, query_type, query_lower: bool(entities.get("schemes")),
+     {"schemes": 0.2, "gos": 0.2}),
+    
+    # Rule 7: RTE/Constitutional queries
+    (lambda entities, query_type, query_lower: any(
+        term in query_lower for term in ["rte", "right to education", "article", "constitution"]
+    ), {"legal": 0.3}),
+    
+    # Rule 8: Service rules
+    (lambda entities, query_type, query_lower: "service" in query_lower,
+     {"legal": 0.25, "gos": 0.25}),
+]
+
+
+def _combine_scores_numpy(
+    base: np.ndarray,
+    facet_scores: np.ndarray,
+    entity_scores: np.ndarray,
+    signal_weights: np.ndarray,
+    signals: np.ndarray
+) -> np.ndarray:
+    """base + 0.3*facet + 0.2*entity + signal_weights @ signals, clipped to [0, 1]"""
+    scores = base + facet_scores * 0.3 + entity_scores * 0.2 + signal_weights @ signals
+    return np.clip(scores, 0.0, 1.0)
+
+
+def _combine_scores_loop(base, facet_scores, entity_scores, signal_weights, signals):
+    """Same reduction as _combine_scores_numpy as one fused loop, compiled by Numba"""
+    n_engines, n_signals = signal_weights.shape
+    scores = np.empty(n_engines)
+    for i in range(n_engines):
+        total = base[i] + facet_scores[i] * 0.3 + entity_scores[i] * 0.2
+        for j in range(n_signals):
+            total += signal_weights[i, j] * signals[j]
+        scores[i] = min(max(total, 0.0), 1.0)
+    return scores
+
+
+# A handful of engines is too small for numpy's per-call overhead to amortize;
+# the fused Numba kernel does the whole reduction in one native call
+if NUMBA_AVAILABLE:
+    _combine_scores = njit(cache=True, fastmath=True)(_combine_scores_loop)
+else:
+    _combine_scores = _combine_scores_numpy
+
 
 class EngineScorer:
     """Scores RAG engines for a given analyzed query"""
@@ -15,146 +103,102 @@ class EngineScorer:
         self.engines = self.config["engines"]
         self.engine_facets = get_all_facets()
         
+        # Fixed engine order so every signal can be scored as one array op
+        self._engine_names = tuple(self.engines.keys())
+        self._base_weights = np.array(
+            [self.engines[name]["weight"] for name in self._engine_names], dtype=float
+        )
+        self._engine_facet_sets = tuple(
+            frozenset(self.engine_facets.get(name, [])) for name in self._engine_names
+        )
+        self._has_facets = np.array([bool(fs) for fs in self._engine_facet_sets])
+        
+        # Engine x entity-type relevance matrix
+        self._entity_types = sorted({et for types in ENTITY_RELEVANCE.values() for et in types})
+        self._entity_relevance = np.array([
+            [et in ENTITY_RELEVANCE.get(name, []) for et in self._entity_types]
+            for name in self._engine_names
+        ], dtype=float)
+        
+        # Engine x signal weights; signal 0 is "query is temporal", signal k is rule k firing
+        recency = [[RECENCY_BOOSTS.get(name, 0.0) * 0.15] for name in self._engine_names]
+        rule_bonuses = [
+            [engine_bonuses.get(name, 0.0) for _, engine_bonuses in SCORING_RULES]
+            for name in self._engine_names
+        ]
+        self._signal_weights = np.hstack([
+            np.array(recency, dtype=float).reshape(len(self._engine_names), 1),
+            np.array(rule_bonuses, dtype=float).reshape(len(self._engine_names), len(SCORING_RULES))
+        ])
+        self._rule_predicates = tuple(predicate for predicate, _ in SCORING_RULES)
+        
     def score_engines(self, features: Dict[str, Any]) -> List[Tuple[str, float]]:
         """
         Score all engines based on query features
-        Returns sorted list of (engine_name, score) tuples
-        """
-        scores = {}
-        
-        for engine_name in self.engines.keys():
-            score = self._compute_engine_score(engine_name, features)
-            scores[engine_name] = score
-        
-        # Sort by score descending
-        sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        
-        return sorted_scores
-    
-    def _compute_engine_score(self, engine_name: str, features: Dict[str, Any]) -> float:
-        """
-        Compute score for a single engine using multiple signals
         Score = base_weight + facet_match + entity_boost + recency_boost + rule_bonus
+        Returns sorted list of (engine_name, score) tuples
         """
-        engine_config = self.engines[engine_name]
-        
-        # Start with base weight from config
-        score = engine_config["weight"]
+        # Lowercase once for every text-based rule
+        query_lower = features.get("normalized_query", "").lower()
         
         # Facet matching score
-        facet_score = self._score_facet_match(engine_name, features.get("facets", []))
-        score += facet_score * 0.3
+        facet_scores = self._score_facet_match(features.get("facets", []))
         
         # Entity-based boosting
-        entity_boost = self._score_entity_overlap(engine_name, features.get("entities", {}))
-        score += entity_boost * 0.2
+        entity_scores = self._score_entity_overlap(features.get("entities", {}))
+        
+        # Recency boost for temporal queries and rule-based bonuses
+        signals = self._score_signals(features, query_lower)
         
-        # Recency boost for temporal queries
-        if features.get("temporal", {}).get("has_temporal"):
-            recency_boost = self._score_recency(engine_name, features)
-            score += recency_boost * 0.15
+        # Weighted sum, normalized to 0-1 range
+        scores = _combine_scores(
+            self._base_weights, facet_scores, entity_scores, self._signal_weights, signals
+        )
         
-        # Rule-based bonuses
-        rule_bonus = self._apply_rules(engine_name, features)
-        score += rule_bonus
+        # Sort by score descending (stable, so ties keep config order)
+        order = np.argsort(-scores, kind="stable")
         
-        # Normalize to 0-1 range
-        return min(max(score, 0.0), 1.0)
+        return [(self._engine_names[i], float(scores[i])) for i in order]
     
-    def _score_facet_match(self, engine_name: str, query_facets: List[str]) -> float:
-        """Score based on facet overlap"""
+    def _score_facet_match(self, query_facets: List[str]) -> np.ndarray:
+        """Score every engine based on facet overlap (Jaccard similarity)"""
         if not query_facets:
-            return 0.0
-        
-        engine_facets = self.engine_facets.get(engine_name, [])
-        
-        if not engine_facets:
-            # Engines without facets get a small base score
-            return 0.1
-        
-        # Compute Jaccard similarity
-        intersection = set(query_facets) & set(engine_facets)
-        union = set(query_facets) | set(engine_facets)
-        
-        if not union:
-            return 0.0
-        
-        return len(intersection) / len(union)
+            return np.zeros(len(self._engine_names))
+        
+        query_facet_set = set(query_facets)
+        intersections = np.array(
+            [len(query_facet_set & fs) for fs in self._engine_facet_sets], dtype=float
+        )
+        unions = np.array(
+            [len(query_facet_set | fs) for fs in self._engine_facet_sets], dtype=float
+        )
+        
+        # Engines without facets get a small base score
+        return np.where(self._has_facets, intersections / np.maximum(unions, 1), 0.1)
     
-    def _score_entity_overlap(self, engine_name: str, entities: Dict[str, List[str]]) -> float:
-        """Boost score based on entity types relevant to engine"""
-        entity_relevance = {
-            "legal": ["legal_refs", "case_citations"],
-            "judicial": ["case_citations", "legal_refs"],
-            "gos": ["go_numbers"],
-            "data_report": ["metrics"],
-            "schemes": ["schemes"]
-        }
-        
-        relevant_entity_types = entity_relevance.get(engine_name, [])
-        
-        if not relevant_entity_types:
-            return 0.0
+    def _score_entity_overlap(self, entities: Dict[str, List[str]]) -> np.ndarray:
+        """Boost every engine based on entity types relevant to it"""
+        entity_counts = np.array(
+            [len(entities.get(et, [])) for et in self._entity_types], dtype=float
+        )
         
-        # Count how many relevant entities are present
-        entity_count = sum(len(entities.get(et, [])) for et in relevant_entity_types)
+        # Count how many relevant entities are present per engine
+        relevant_counts = self._entity_relevance @ entity_counts
         
         # Normalize (diminishing returns)
-        return min(entity_count * 0.2, 0.5)
+        return np.minimum(relevant_counts * 0.2, 0.5)
     
-    def _score_recency(self, engine_name: str, features: Dict[str, Any]) -> float:
-        """Boost engines that typically have recent data for temporal queries"""
-        # GOs and Data Reports are typically more time-sensitive
-        recency_engines = {"gos": 0.3, "data_report": 0.25, "schemes": 0.2}
-        
-        return recency_engines.get(engine_name, 0.0)
-    
-    def _apply_rules(self, engine_name: str, features: Dict[str, Any]) -> float:
-        """Apply domain-specific rules for scoring"""
-        bonus = 0.0
-        
+    def _score_signals(self, features: Dict[str, Any], query_lower: str) -> np.ndarray:
+        """0/1 signal vector: temporal flag, then each domain rule (predicate evaluated once)"""
         entities = features.get("entities", {})
         query_type = features.get("query_type", "general")
-        query_lower = features.get("normalized_query", "").lower()
-        
-        # Rule 1: Legal queries with sections/acts strongly favor legal + gos
-        if entities.get("legal_refs") and engine_name in ["legal", "gos"]:
-            bonus += 0.3
-        
-        # Rule 2: Transfer queries need legal + gos
-        if "transfer" in query_lower and engine_name in ["legal", "gos"]:
-            bonus += 0.25
         
-        # Rule 3: Case citations need judicial + legal
-        if entities.get("case_citations") and engine_name in ["judicial", "legal"]:
-            bonus += 0.3
+        signals = np.empty(len(self._rule_predicates) + 1)
+        signals[0] = bool(features.get("temporal", {}).get("has_temporal"))
+        for k, predicate in enumerate(self._rule_predicates, start=1):
+            signals[k] = bool(predicate(entities, query_type, query_lower))
         
-        # Rule 4: Statistical queries need data_report
-        if query_type == "statistical" and engine_name == "data_report":
-            bonus += 0.25
-        
-        # Rule 5: GO numbers explicitly mentioned
-        if entities.get("go_numbers"):
-            if engine_name == "gos":
-                bonus += 0.4  # Strong signal
-            elif engine_name == "legal":
-                bonus += 0.15  # Supporting context
-        
-        # Rule 6: Scheme queries
-        if entities.get("schemes") and engine_name in ["schemes", "gos"]:
-            bonus += 0.2
-        
-        # Rule 7: RTE/Constitutional queries
-        if any(term in query_lower for term in ["rte", "right to education", "article", "constitution"]):
-            if engine_name == "legal":
-                bonus += 0.3
-        
-        # Rule 8: Service rules
-        if "service" in query_lower and engine_name in ["legal", "gos"]:
-            bonus += 0.25
-        
-        return bonus
-
+        return signals
 
 def select_engines(
     scores: List[Tuple[str, float]], 
@@ -2,23 +2,44 @@
 Planner - Creates execution plan for multi-engine retrieval
 Combines query analysis and engine scoring into actionable plan
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from functools import lru_cache
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-from router.query_analyzer import QueryAnalyzer
+from router.query_analyzer import get_query_analyzer
 from router.engine_scorer import EngineScorer, select_engines, apply_forced_pairs
 from config import load_config
 
 
+# Engines that filter on an extracted entity type: engine -> (entity type, filter key)
+ENGINE_ENTITY_FILTERS = {
+    "gos": ("go_numbers", "go_numbers"),
+    "judicial": ("case_citations", "case_citations"),
+    "legal": ("legal_refs", "legal_refs")
+}
+
+
 class QueryPlanner:
     """Creates detailed execution plans for multi-engine RAG queries"""
     
+    __slots__ = ("analyzer", "scorer", "config", "_engine_facets_fs", "_route_cached")
+    
     def __init__(self):
-        self.analyzer = QueryAnalyzer()
+        self.analyzer = get_query_analyzer()
         self.scorer = EngineScorer()
         self.config = load_config()
         
+        # Engine facet sets, built once for the per-plan intersections
+        self._engine_facets_fs = {
+            name: frozenset(cfg.get("facets", []))
+            for name, cfg in self.config["engines"].items()
+        }
+        
+        # Routing is deterministic per (query, max_engines), so memoize it per planner
+        cache_size = self.config.get("performance", {}).get("plan_cache_size", 1024)
+        self._route_cached = lru_cache(maxsize=cache_size)(self._route)
+        
     def create_plan(
         self, 
         query: str, 
@@ -33,6 +54,25 @@ class QueryPlanner:
         if max_engines is None:
             max_engines = self.config["routing"]["max_engines"]
         
+        # Scoring dominates routing, so only its immutable result is cached; each
+        # call builds a fresh plan around it from a fresh (cached) analysis
+        engine_scores, selected_engines = self._route_cached(query, max_engines)
+        plan = self._build_plan(
+            query=query,
+            features=self.analyzer.analyze(query),
+            engine_scores=dict(engine_scores),
+            selected_engines=list(selected_engines)
+        )
+        plan["plan_id"] = uuid.uuid4().hex
+        plan["created_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        plan["user_context"] = user_context or {}
+        
+        return plan
+    
+    def _route(
+        self, query: str, max_engines: int
+    ) -> Tuple[Tuple[Tuple[str, float], ...], Tuple[str, ...]]:
+        """Score and select engines; the immutable result is cached by create_plan"""
         min_score = self.config["routing"]["min_score"]
         
         # Step 1: Analyze query
@@ -48,35 +88,33 @@ class QueryPlanner:
         if self.config["routing"].get("force_pairs"):
             selected = apply_forced_pairs(selected, features)
         
-        # Step 5: Build detailed plan
-        plan = self._build_plan(
-            query=query,
-            features=features,
-            engine_scores=dict(engine_scores),
-            selected_engines=selected,
-            user_context=user_context or {}
-        )
-        
-        return plan
+        return tuple(engine_scores), tuple(selected)
     
     def _build_plan(
         self,
         query: str,
         features: Dict[str, Any],
         engine_scores: Dict[str, float],
-        selected_engines: List[str],
-        user_context: Dict[str, Any]
+        selected_engines: List[str]
     ) -> Dict[str, Any]:
-        """Construct the full execution plan"""
+        """Construct the full execution plan (plan_id, created_at, user_context set by caller)"""
         
-        plan_id = str(uuid.uuid4())
+        # Feature lookups shared by every engine config, done once per plan
+        query_facets_fs = frozenset(features.get("facets", []))
+        temporal = features.get("temporal", {})
+        has_temporal = bool(temporal.get("has_temporal"))
+        jurisdiction = features.get("jurisdiction", "Andhra Pradesh")
+        entities = features.get("entities", {})
+        constraints = features.get("constraints", {})
         
         # Build per-engine configurations
-        engine_configs = {}
-        for engine_name in selected_engines:
-            engine_configs[engine_name] = self._build_engine_config(
-                engine_name, features
+        engine_configs = {
+            engine_name: self._build_engine_config(
+                engine_name, query_facets_fs, has_temporal, temporal,
+                jurisdiction, entities, constraints
             )
+            for engine_name in selected_engines
+        }
         
         # Determine retrieval strategy
         parallel = self.config["routing"].get("parallel_retrieval", True)
@@ -87,9 +125,9 @@ class QueryPlanner:
         )
         
         plan = {
-            "plan_id": plan_id,
+            "plan_id": None,
             "query": query,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": None,
             
             # Analysis results
             "features": features,
@@ -108,7 +146,7 @@ class QueryPlanner:
             
             # Metadata
             "routing_rationale": rationale,
-            "user_context": user_context,
+            "user_context": None,
             "constraints": features["constraints"],
             "temporal": features["temporal"]
         }
@@ -118,9 +156,14 @@ class QueryPlanner:
     def _build_engine_config(
         self, 
         engine_name: str, 
-        features: Dict[str, Any]
+        query_facets_fs: frozenset,
+        has_temporal: bool,
+        temporal: Dict[str, Any],
+        jurisdiction: str,
+        entities: Dict[str, List[str]],
+        constraints: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Build configuration for a specific engine"""
+        """Build configuration for a specific engine from the plan's pre-extracted features"""
         
         config = {
             "engine_name": engine_name,
@@ -130,37 +173,26 @@ class QueryPlanner:
         }
         
         # Add relevant facets as hints
-        engine_facets = self.config["engines"][engine_name].get("facets", [])
-        query_facets = features.get("facets", [])
-        relevant_facets = list(set(engine_facets) & set(query_facets))
-        config["facet_hints"] = relevant_facets
+        config["facet_hints"] = list(self._engine_facets_fs[engine_name] & query_facets_fs)
         
         # Add temporal filters if present
-        temporal = features.get("temporal", {})
-        if temporal.get("has_temporal"):
+        if has_temporal:
             if temporal.get("years"):
                 config["filters"]["years"] = temporal["years"]
             if temporal.get("fiscal_years"):
                 config["filters"]["fiscal_years"] = temporal["fiscal_years"]
         
         # Add jurisdiction filters
-        jurisdiction = features.get("jurisdiction", "Andhra Pradesh")
         config["filters"]["jurisdiction"] = jurisdiction
         
         # Add entity-specific filters
-        entities = features.get("entities", {})
-        
-        if engine_name == "gos" and entities.get("go_numbers"):
-            config["filters"]["go_numbers"] = entities["go_numbers"]
-        
-        if engine_name == "judicial" and entities.get("case_citations"):
-            config["filters"]["case_citations"] = entities["case_citations"]
-        
-        if engine_name == "legal" and entities.get("legal_refs"):
-            config["filters"]["legal_refs"] = entities["legal_refs"]
+        entity_filter = ENGINE_ENTITY_FILTERS.get(engine_name)
+        if entity_filter:
+            entity_type, filter_key = entity_filter
+            if entities.get(entity_type):
+                config["filters"][filter_key] = entities[entity_type]
         
         # Add constraints
-        constraints = features.get("constraints", {})
         if constraints.get("districts"):
             config["filters"]["districts"] = constraints["districts"]
         
@@ -225,6 +257,17 @@ class QueryPlanner:
         )
 
 
+@lru_cache(maxsize=1)
+def get_query_planner() -> QueryPlanner:
+    """
+    Process-wide QueryPlanner
+    
+    Shared so the analyzer, scorer matrices and plan cache are built once
+    rather than per request
+    """
+    return QueryPlanner()
+
+
 if __name__ == "__main__":
     # Test the planner
     planner = QueryPlanner()
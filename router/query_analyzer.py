@@ -4,55 +4,221 @@ Performs NER for legal citations, GO numbers, case law, metrics, dates, etc.
 """
 import re
 from typing import Dict, List, Any, Tuple
+from functools import lru_cache
 from datetime import datetime
 from config import load_config
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+
+# Keywords mapping a query to each facet
+FACET_KEYWORDS = {
+    "aser": ["aser", "learning level", "reading level"],
+    "budget": ["budget", "allocation", "expenditure", "fund"],
+    "financial": ["financial", "audit", "accounts"],
+    "nas": ["nas", "national achievement"],
+    "ses": ["socio-economic", "survey", "ses"],
+    "teacher_data": ["teacher", "faculty", "staff data"],
+    "udise": ["udise", "school statistics", "enrollment"],
+    "ap_edu": ["ap education", "state education"],
+    "constitution": ["constitution", "article"],
+    "ntce": ["ncte", "teacher education"],
+    "rte": ["rte", "right to education", "section 12"],
+    "service": ["service rule", "service regulation"],
+    "transfer": ["transfer", "posting", "deployment"]
+}
+
+# Scheme names recognized by keyword
+SCHEME_KEYWORDS = ["PM POSHAN", "KGBV", "Bala badi", "scholarship", "MDM", "Samagra Shiksha"]
+
+# Query types in priority order: the first type with a matching keyword wins
+QUERY_TYPE_KEYWORDS = [
+    ("definitional", ["what", "define", "explain", "meaning"]),
+    ("statistical", ["how many", "statistics", "data", "number"]),
+    ("temporal", ["when", "date", "year"]),
+    ("authority", ["who", "which authority", "responsible"]),
+    ("procedural", ["how", "process", "procedure"]),
+    ("legal_validity", ["can", "allowed", "permitted", "legal"])
+]
+
+SCHOOL_TYPES = ["primary", "upper primary", "secondary", "higher secondary", "high school"]
+
+# Common abbreviations standardized by _normalize
+ABBREVIATIONS = {
+    "G.O.": "GO",
+    "G O": "GO",
+    "Govt.": "Government",
+    "Sec.": "Section",
+    "Art.": "Article"
+}
+_ABBREVIATION_PATTERN = re.compile("|".join(re.escape(abbr) for abbr in ABBREVIATIONS))
+
+
+def _copy_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of an analysis that callers may mutate without touching the cached one
+    
+    Analyses nest dicts and lists at most two levels deep and list items are
+    strings or tuples, so copying just those containers is a full copy at a
+    fraction of copy.deepcopy's cost.
+    """
+    result = {}
+    for key, value in analysis.items():
+        if isinstance(value, dict):
+            value = {k: list(v) if isinstance(v, list) else v for k, v in value.items()}
+        elif isinstance(value, list):
+            value = list(value)
+        result[key] = value
+    return result
+
+
+class KeywordMatcher:
+    """
+    Substring matcher for many keywords at once
+    
+    Uses a single Aho-Corasick automaton pass over the text when pyahocorasick
+    is installed, otherwise falls back to one `in` check per keyword.
+    """
+    
+    def __init__(self, keywords: List[Tuple[str, Any]]):
+        """
+        Args:
+            keywords: (lowercase keyword, payload) pairs; a keyword may carry several payloads
+        """
+        self._keywords = keywords
+        self._automaton = None
+        
+        if AHOCORASICK_AVAILABLE and keywords:
+            payloads: Dict[str, List[Any]] = {}
+            for keyword, payload in keywords:
+                payloads.setdefault(keyword, []).append(payload)
+            
+            automaton = ahocorasick.Automaton()
+            for keyword, keyword_payloads in payloads.items():
+                automaton.add_word(keyword, tuple(keyword_payloads))
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def find(self, text: str) -> set:
+        """Return the payloads of every keyword occurring in text"""
+        if self._automaton is None:
+            return {payload for keyword, payload in self._keywords if keyword in text}
+        
+        found = set()
+        for _, payloads in self._automaton.iter(text):
+            found.update(payloads)
+        return found
+
 
 class QueryAnalyzer:
     """Analyzes policy queries to extract structured information"""
     
+    __slots__ = (
+        "config", "patterns", "synonyms", "temporal_keywords",
+        "_legal_re", "_go_re", "_case_re", "_metric_re",
+        "_district_re", "_year_re", "_fy_re", "_keyword_matcher", "_analyze_cached"
+    )
+    
     def __init__(self):
         self.config = load_config()
         self.patterns = self.config.get("entity_extraction", {})
         self.synonyms = self.config.get("synonyms", {})
         self.temporal_keywords = self.config.get("temporal_keywords", [])
         
+        # Compile each entity category's patterns once. They are deliberately not
+        # joined into one alternation: that keeps only the leftmost of overlapping
+        # matches, and measured slower than per-pattern findall() on real queries
+        self._legal_re = self._compile_patterns("legal_patterns")
+        self._go_re = self._compile_patterns("go_patterns")
+        self._case_re = self._compile_patterns("case_patterns")
+        self._metric_re = [
+            (pattern, re.compile(pattern, re.IGNORECASE))
+            for pattern in self.patterns.get("metric_patterns", [])
+        ]
+        
+        self._district_re = re.compile(r'\b(?:in|for|of)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+district\b')
+        self._year_re = re.compile(r'\b(19|20)\d{2}\b')
+        self._fy_re = re.compile(r'FY\s*(20\d{2})[-\s]*(20)?\d{2}', re.IGNORECASE)
+        
+        # Every keyword class in one matcher, payloads tagged (class, value),
+        # so a single scan of the lowercased query feeds all of them
+        keywords = [
+            (kw, ("facet", facet)) for facet, kws in FACET_KEYWORDS.items() for kw in kws
+        ]
+        keywords += [(term, ("expand", term)) for term in self.synonyms]
+        keywords += [
+            (kw, ("qtype", (priority, query_type)))
+            for priority, (query_type, kws) in enumerate(QUERY_TYPE_KEYWORDS)
+            for kw in kws
+        ]
+        keywords += [(kw.lower(), ("scheme", kw)) for kw in SCHEME_KEYWORDS]
+        keywords += [(kw.lower(), ("temporal", kw)) for kw in self.temporal_keywords]
+        keywords += [(kw, ("school_type", kw)) for kw in SCHOOL_TYPES]
+        self._keyword_matcher = KeywordMatcher(keywords)
+        
+        # analyze() is a pure function of the query text
+        self._analyze_cached = lru_cache(maxsize=2048)(self._analyze)
+    
+    def _compile_patterns(self, key: str) -> List[re.Pattern]:
+        """Compile the configured regex list for an entity type, case-insensitively"""
+        return [re.compile(pattern, re.IGNORECASE) for pattern in self.patterns.get(key, [])]
+    
+    @staticmethod
+    def _findall_patterns(patterns: List[re.Pattern], query: str) -> List[Any]:
+        """Each pattern's findall() results, concatenated in configured order"""
+        results = []
+        for pattern in patterns:
+            results.extend(pattern.findall(query))
+        return results
+    
     def analyze(self, query: str) -> Dict[str, Any]:
         """
         Main analysis pipeline
         Returns structured information about the query
         """
+        # Fresh containers so callers cannot alter the cached entity lists and nested dicts
+        return _copy_analysis(self._analyze_cached(query))
+    
+    def _analyze(self, query: str) -> Dict[str, Any]:
+        """Uncached analysis of a single query"""
         query_lower = query.lower()
+        keyword_hits = self._scan_keywords(query_lower)
         
         return {
             "original_query": query,
             "normalized_query": self._normalize(query),
-            "entities": self._extract_entities(query),
-            "facets": self._identify_facets(query_lower),
-            "constraints": self._extract_constraints(query),
-            "expansions": self._expand_query(query_lower),
-            "temporal": self._extract_temporal(query),
-            "jurisdiction": self._extract_jurisdiction(query),
-            "query_type": self._classify_query(query_lower)
+            "entities": self._extract_entities(query, keyword_hits),
+            "facets": self._identify_facets(keyword_hits),
+            "constraints": self._extract_constraints(query, keyword_hits),
+            "expansions": self._expand_query(keyword_hits),
+            "temporal": self._extract_temporal(query, keyword_hits),
+            "jurisdiction": self._extract_jurisdiction(query_lower),
+            "query_type": self._classify_query(keyword_hits)
+        }
+    
+    def _scan_keywords(self, query_lower: str) -> Dict[str, set]:
+        """Find every keyword in one pass, grouped by keyword class"""
+        keyword_hits = {
+            "facet": set(), "expand": set(), "qtype": set(),
+            "scheme": set(), "temporal": set(), "school_type": set()
         }
+        for keyword_class, value in self._keyword_matcher.find(query_lower):
+            keyword_hits[keyword_class].add(value)
+        return keyword_hits
     
     def _normalize(self, query: str) -> str:
         """Normalize query text"""
         # Remove extra whitespace
         query = " ".join(query.split())
-        # Standardize common abbreviations
-        replacements = {
-            "G.O.": "GO",
-            "G O": "GO",
-            "Govt.": "Government",
-            "Sec.": "Section",
-            "Art.": "Article"
-        }
-        for old, new in replacements.items():
-            query = query.replace(old, new)
-        return query
+        # Standardize common abbreviations in one pass
+        return _ABBREVIATION_PATTERN.sub(lambda m: ABBREVIATIONS[m.group(0)], query)
     
-    def _extract_entities(self, query: str) -> Dict[str, List[str]]:
+    def _extract_entities(self, query: str, keyword_hits: Dict[str, set]) -> Dict[str, List[str]]:
         """Extract legal, administrative, and domain entities"""
         entities = {
             "legal_refs": [],
@@ -63,65 +229,30 @@ class QueryAnalyzer:
         }
         
         # Extract legal references (Acts, Sections, Articles)
-        if "legal_patterns" in self.patterns:
-            for pattern in self.patterns["legal_patterns"]:
-                matches = re.findall(pattern, query, re.IGNORECASE)
-                entities["legal_refs"].extend(matches)
+        entities["legal_refs"] = self._findall_patterns(self._legal_re, query)
         
         # Extract GO numbers
-        if "go_patterns" in self.patterns:
-            for pattern in self.patterns["go_patterns"]:
-                matches = re.findall(pattern, query, re.IGNORECASE)
-                entities["go_numbers"].extend(matches)
+        entities["go_numbers"] = self._findall_patterns(self._go_re, query)
         
         # Extract case citations
-        if "case_patterns" in self.patterns:
-            for pattern in self.patterns["case_patterns"]:
-                matches = re.findall(pattern, query, re.IGNORECASE)
-                entities["case_citations"].extend(matches)
+        entities["case_citations"] = self._findall_patterns(self._case_re, query)
         
         # Extract metrics (UDISE, GER, ASER, NAS)
-        if "metric_patterns" in self.patterns:
-            for pattern in self.patterns["metric_patterns"]:
-                if re.search(pattern, query, re.IGNORECASE):
-                    entities["metrics"].append(pattern)
+        for pattern, compiled in self._metric_re:
+            if compiled.search(query):
+                entities["metrics"].append(pattern)
         
         # Extract scheme names (keyword-based)
-        scheme_keywords = ["PM POSHAN", "KGBV", "Bala badi", "scholarship", "MDM", "Samagra Shiksha"]
-        for keyword in scheme_keywords:
-            if keyword.lower() in query.lower():
-                entities["schemes"].append(keyword)
+        entities["schemes"] = [kw for kw in SCHEME_KEYWORDS if kw in keyword_hits["scheme"]]
         
         return entities
     
-    def _identify_facets(self, query_lower: str) -> List[str]:
+    def _identify_facets(self, keyword_hits: Dict[str, set]) -> List[str]:
         """Identify which facets are relevant for this query"""
-        facets = []
-        
-        # Map keywords to facets
-        facet_keywords = {
-            "aser": ["aser", "learning level", "reading level"],
-            "budget": ["budget", "allocation", "expenditure", "fund"],
-            "financial": ["financial", "audit", "accounts"],
-            "nas": ["nas", "national achievement"],
-            "ses": ["socio-economic", "survey", "ses"],
-            "teacher_data": ["teacher", "faculty", "staff data"],
-            "udise": ["udise", "school statistics", "enrollment"],
-            "ap_edu": ["ap education", "state education"],
-            "constitution": ["constitution", "article"],
-            "ntce": ["ncte", "teacher education"],
-            "rte": ["rte", "right to education", "section 12"],
-            "service": ["service rule", "service regulation"],
-            "transfer": ["transfer", "posting", "deployment"]
-        }
-        
-        for facet, keywords in facet_keywords.items():
-            if any(kw in query_lower for kw in keywords):
-                facets.append(facet)
-        
-        return facets
+        # Keep the facet declaration order
+        return [facet for facet in FACET_KEYWORDS if facet in keyword_hits["facet"]]
     
-    def _extract_constraints(self, query: str) -> Dict[str, Any]:
+    def _extract_constraints(self, query: str, keyword_hits: Dict[str, set]) -> Dict[str, Any]:
         """Extract filters and constraints"""
         constraints = {
             "districts": [],
@@ -131,29 +262,25 @@ class QueryAnalyzer:
         }
         
         # Extract district names (basic pattern)
-        district_pattern = r'\b(?:in|for|of)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+district\b'
-        districts = re.findall(district_pattern, query)
-        constraints["districts"] = districts
+        constraints["districts"] = self._district_re.findall(query)
         
         # Extract school types
-        school_types = ["primary", "upper primary", "secondary", "higher secondary", "high school"]
-        for stype in school_types:
-            if stype in query.lower():
-                constraints["school_types"].append(stype)
+        constraints["school_types"] = [
+            stype for stype in SCHOOL_TYPES if stype in keyword_hits["school_type"]
+        ]
         
         return constraints
     
-    def _expand_query(self, query_lower: str) -> List[str]:
+    def _expand_query(self, keyword_hits: Dict[str, set]) -> List[str]:
         """Expand query with synonyms and related terms"""
         expansions = []
         
-        for term, synonyms_list in self.synonyms.items():
-            if term in query_lower:
-                expansions.extend(synonyms_list)
+        for term in keyword_hits["expand"]:
+            expansions.extend(self.synonyms[term])
         
         return list(set(expansions))
     
-    def _extract_temporal(self, query: str) -> Dict[str, Any]:
+    def _extract_temporal(self, query: str, keyword_hits: Dict[str, set]) -> Dict[str, Any]:
         """Extract temporal constraints"""
         temporal = {
             "has_temporal": False,
@@ -163,60 +290,63 @@ class QueryAnalyzer:
         
         # Check for temporal keywords
         for keyword in self.temporal_keywords:
-            if keyword.lower() in query.lower():
+            if keyword in keyword_hits["temporal"]:
                 temporal["has_temporal"] = True
                 temporal["references"].append(keyword)
         
         # Extract specific years
-        year_pattern = r'\b(19|20)\d{2}\b'
-        years = re.findall(year_pattern, query)
+        years = self._year_re.findall(query)
         if years:
             temporal["has_temporal"] = True
             temporal["years"] = years
         
         # Extract FY patterns
-        fy_pattern = r'FY\s*(20\d{2})[-\s]*(20)?\d{2}'
-        fy_matches = re.findall(fy_pattern, query, re.IGNORECASE)
+        fy_matches = self._fy_re.findall(query)
         if fy_matches:
             temporal["has_temporal"] = True
             temporal["fiscal_years"] = fy_matches
         
         return temporal
     
-    def _extract_jurisdiction(self, query: str) -> str:
+    def _extract_jurisdiction(self, query_lower: str) -> str:
         """Extract geographic jurisdiction"""
         # Default to Andhra Pradesh
-        if "telangana" in query.lower():
+        if "telangana" in query_lower:
             return "Telangana"
         return "Andhra Pradesh"
     
-    def _classify_query(self, query_lower: str) -> str:
-        """Classify the type of query"""
-        if any(word in query_lower for word in ["what", "define", "explain", "meaning"]):
-            return "definitional"
-        elif any(word in query_lower for word in ["how many", "statistics", "data", "number"]):
-            return "statistical"
-        elif any(word in query_lower for word in ["when", "date", "year"]):
-            return "temporal"
-        elif any(word in query_lower for word in ["who", "which authority", "responsible"]):
-            return "authority"
-        elif any(word in query_lower for word in ["how", "process", "procedure"]):
-            return "procedural"
-        elif any(word in query_lower for word in ["can", "allowed", "permitted", "legal"]):
-            return "legal_validity"
-        else:
+    def _classify_query(self, keyword_hits: Dict[str, set]) -> str:
+        """Classify the type of query: the highest-priority type with a keyword hit wins"""
+        matches = keyword_hits["qtype"]
+        
+        if not matches:
             return "general"
+        
+        # (priority, type) pairs; lowest priority number is the first if/elif branch
+        return min(matches)[1]
+
+
+@lru_cache(maxsize=1)
+def get_query_analyzer() -> QueryAnalyzer:
+    """
+    Process-wide QueryAnalyzer
+    
+    Shared so compiled patterns, the keyword automaton and the analysis cache
+    are built once rather than per request
+    """
+    return QueryAnalyzer()
 
 
 # Utility functions
 def highlight_entities(query: str, entities: Dict[str, List[str]]) -> str:
     """Highlight extracted entities in the original query"""
-    highlighted = query
-    for entity_type, items in entities.items():
-        for item in items:
-            if item in highlighted:
-                highlighted = highlighted.replace(item, f"**{item}**")
-    return highlighted
+    items = {item for items in entities.values() for item in items if isinstance(item, str) and item}
+    if not items:
+        return query
+    
+    # Longest first so "Section 12" wins over "12"; one pass never re-marks a highlight
+    pattern = re.compile("|".join(re.escape(item) for item in sorted(items, key=len, reverse=True)))
+    return pattern.sub(lambda m: f"**{m.group(0)}**", query)
 
 
 if __name__ == "__main__":
@@ -2,17 +2,20 @@
 Test enhanced query system with LLM optimization
 """
 import asyncio
+import re
 import sys
 import os
 
 # Add current directory to path
 sys.path.append(os.getcwd())
 
-import vertexai
 from vertexai.generative_models import GenerativeModel
 from vertexai.preview import rag
 from vertexai.preview.rag import RagResource
 
+# Shared with the other test scripts so one process initializes Vertex once
+from rag_test_utils import PROJECT_ID, LOCATION, vertex_ready
+
 # Simple logger for this test
 class SimpleLogger:
     def info(self, msg): print(f"INFO: {msg}")
@@ -21,15 +24,28 @@ class SimpleLogger:
 logger = SimpleLogger()
 
 # Configuration
-PROJECT_ID = "tech-bharath"
-LOCATION = "asia-south1"
 CORPUS_ID = "projects/tech-bharath/locations/asia-south1/ragCorpora/7638104968020361216"
 
+# Bound concurrent RAG calls so gathered searches stay within Vertex quotas
+RAG_CONCURRENCY = 8
+_rag_semaphore = asyncio.Semaphore(RAG_CONCURRENCY)
+
+# The same query is searched repeatedly across tests; share one lookup per query
+_search_tasks = {}
+_rag_resources = [RagResource(rag_corpus=CORPUS_ID)]
+
+# One pass over the LLM response picks up every labelled field
+_RESPONSE_PATTERN = re.compile(
+    r'^[ \t]*(?:ENHANCED QUERY:(?P<enhanced_query>.*)|SEARCH TERMS:(?P<search_terms>.*)'
+    r'|REASONING:(?P<reasoning>.*)|CONFIDENCE:(?P<confidence>.*))',
+    re.MULTILINE
+)
+
 class LLMQueryEnhancer:
     """LLM-powered query enhancement"""
     
     def __init__(self):
-        vertexai.init(project=PROJECT_ID, location=LOCATION)
+        vertex_ready(PROJECT_ID, LOCATION)
         self.model = GenerativeModel("gemini-2.5-flash")
     
     async def enhance_query(self, query: str, agent_type: str = "education") -> dict:
@@ -61,13 +77,8 @@ REASONING: [Brief explanation of why this enhancement will improve retrieval]
 CONFIDENCE: [High/Medium/Low confidence in this enhancement]"""
 
         try:
-            loop = asyncio.get_event_loop()
-            
-            def sync_generate():
-                response = self.model.generate_content(prompt)
-                return response.text
-            
-            enhanced_response = await loop.run_in_executor(None, sync_generate)
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            enhanced_response = response.text
             return self._parse_response(enhanced_response, query)
             
         except Exception as e:
@@ -89,17 +100,13 @@ CONFIDENCE: [High/Medium/Low confidence in this enhancement]"""
         }
         
         try:
-            for line in response.split('\n'):
-                line = line.strip()
-                if line.startswith("ENHANCED QUERY:"):
-                    result["enhanced_query"] = line.replace("ENHANCED QUERY:", "").strip()
-                elif line.startswith("SEARCH TERMS:"):
-                    terms = line.replace("SEARCH TERMS:", "").strip()
-                    result["search_terms"] = [t.strip() for t in terms.split(',')]
-                elif line.startswith("REASONING:"):
-                    result["reasoning"] = line.replace("REASONING:", "").strip()
-                elif line.startswith("CONFIDENCE:"):
-                    result["confidence"] = line.replace("CONFIDENCE:", "").strip()
+            for match in _RESPONSE_PATTERN.finditer(response):
+                field = match.lastgroup
+                value = match.group(field).strip()
+                if field == "search_terms":
+                    result["search_terms"] = [t.strip() for t in value.split(',')]
+                else:
+                    result[field] = value
         except:
             pass
             
@@ -128,17 +135,28 @@ async def test_rag_with_enhancements():
         print(f"TESTING QUERY: {query}")
         print(f"{'='*60}")
         
+        # Original search and LLM enhancement are independent - run them together
+        original_results, enhancement = await asyncio.gather(
+            search_rag(query),
+            enhancer.enhance_query(query, "education")
+        )
+        enhanced_query = enhancement["enhanced_query"]
+        
+        # Enhanced query and top 3 search terms, searched concurrently
+        terms = enhancement["search_terms"][:3]
+        enhanced_results, *term_results = await asyncio.gather(
+            search_rag(enhanced_query),
+            *[search_rag(term) for term in terms]
+        )
+        
         # 1. Test original query
         print("\n1. ORIGINAL QUERY RESULTS:")
-        original_results = await search_rag(query)
         print(f"   Found: {len(original_results)} documents")
         if original_results:
             print(f"   Sample: {original_results[0]['text'][:80]}...")
         
         # 2. Test LLM-enhanced query
         print("\n2. LLM ENHANCEMENT:")
-        enhancement = await enhancer.enhance_query(query, "education")
-        enhanced_query = enhancement["enhanced_query"]
         
         print(f"   Original: {query}")
         print(f"   Enhanced: {enhanced_query}")
@@ -146,7 +164,6 @@ async def test_rag_with_enhancements():
         print(f"   Confidence: {enhancement['confidence']}")
         
         print("\n3. ENHANCED QUERY RESULTS:")
-        enhanced_results = await search_rag(enhanced_query)
         print(f"   Found: {len(enhanced_results)} documents")
         if enhanced_results:
             print(f"   Sample: {enhanced_results[0]['text'][:80]}...")
@@ -163,18 +180,28 @@ async def test_rag_with_enhancements():
         
         # 4. Test each search term individually
         print(f"\n5. INDIVIDUAL SEARCH TERMS:")
-        for term in enhancement["search_terms"][:3]:  # Test top 3 terms
-            term_results = await search_rag(term)
-            print(f"   '{term}': {len(term_results)} docs")
+        for term, results in zip(terms, term_results):
+            print(f"   '{term}': {len(results)} docs")
 
 async def search_rag(query: str) -> list:
-    """Search RAG corpus"""
+    """Search RAG corpus (concurrent callers for the same query share one lookup)"""
+    task = _search_tasks.get(query)
+    if task is None:
+        task = asyncio.ensure_future(_search_rag(query))
+        _search_tasks[query] = task
+    return await task
+
+async def _search_rag(query: str) -> list:
+    """Run one RAG search"""
     try:
-        response = rag.retrieval_query(
-            text=query,
-            rag_resources=[RagResource(rag_corpus=CORPUS_ID)],
-            similarity_top_k=5
-        )
+        # Run the blocking SDK call in a thread so concurrent searches overlap
+        async with _rag_semaphore:
+            response = await asyncio.to_thread(
+                rag.retrieval_query,
+                text=query,
+                rag_resources=_rag_resources,
+                similarity_top_k=5
+            )
         
         contexts = []
         if hasattr(response, 'contexts') and hasattr(response.contexts, 'contexts'):
@@ -190,6 +217,8 @@ async def search_rag(query: str) -> list:
         
     except Exception as e:
         logger.error(f"RAG search failed for '{query}': {e}")
+        # Don't cache failures
+        _search_tasks.pop(query, None)
         return []
 
 async def find_best_enhancements():
@@ -214,29 +243,30 @@ async def find_best_enhancements():
     for query in problematic_queries:
         print(f"\nOptimizing: {query}")
         
-        # Try multiple enhancement approaches
-        enhancements = []
-        
-        # Approach 1: General enhancement
-        enh1 = await enhancer.enhance_query(query, "education")
-        enhancements.append(("General", enh1))
-        
-        # Approach 2: Policy-focused enhancement
+        # Try multiple enhancement approaches concurrently:
+        # general, policy-focused and regulation-focused
         policy_query = f"policy guidelines for {query}"
-        enh2 = await enhancer.enhance_query(policy_query, "education")
-        enhancements.append(("Policy-focused", enh2))
-        
-        # Approach 3: Regulation-focused enhancement
         reg_query = f"regulations and rules about {query}"
-        enh3 = await enhancer.enhance_query(reg_query, "education")
-        enhancements.append(("Regulation-focused", enh3))
+        enh1, enh2, enh3 = await asyncio.gather(
+            enhancer.enhance_query(query, "education"),
+            enhancer.enhance_query(policy_query, "education"),
+            enhancer.enhance_query(reg_query, "education")
+        )
+        enhancements = [
+            ("General", enh1),
+            ("Policy-focused", enh2),
+            ("Regulation-focused", enh3)
+        ]
         
         # Test each enhancement
         best_count = 0
         best_enhancement = None
         
-        for name, enh in enhancements:
-            results = await search_rag(enh["enhanced_query"])
+        all_results = await asyncio.gather(
+            *[search_rag(enh["enhanced_query"]) for _, enh in enhancements]
+        )
+        
+        for (name, enh), results in zip(enhancements, all_results):
             count = len(results)
             print(f"  {name}: {count} results - '{enh['enhanced_query'][:50]}...'")
             
@@ -261,9 +291,10 @@ async def find_best_enhancements():
         print(f"Enhanced: {enhancement['enhanced_query']}")
         print(f"Reasoning: {enhancement['reasoning']}")
 
+async def main():
+    """Run the enhancement tests"""
+    await test_rag_with_enhancements()
+    await find_best_enhancements()
+
 if __name__ == "__main__":
-    async def main():
-        await test_rag_with_enhancements()
-        await find_best_enhancements()
-    
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
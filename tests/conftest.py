@@ -0,0 +1,56 @@
+"""
+Shared pytest setup - Makes the repo root importable and stubs the Vertex AI SDK
+"""
+from pathlib import Path
+from unittest.mock import MagicMock
+import importlib
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# SDK modules replaced by the vertex_sdk fixture
+SDK_MODULES = (
+    "google",
+    "google.cloud",
+    "google.cloud.aiplatform",
+    "vertexai",
+    "vertexai.generative_models",
+    "vertexai.language_models",
+    "vertexai.preview",
+    "vertexai.preview.caching",
+    "vertexai.preview.generative_models",
+    "vertexai.preview.rag"
+)
+
+# Repo modules that bind SDK names at import time
+SDK_DEPENDENT_MODULES = (
+    "llm.enhancement_cache",
+    "llm.synth",
+    "rag_clients.doc_cache",
+    "rag_clients.vertex_rag"
+)
+
+
+@pytest.fixture
+def vertex_sdk(monkeypatch):
+    """
+    Replace the Vertex AI SDK with MagicMock modules
+    
+    Yields the stubs by module name plus an `load(name)` helper that imports a
+    repo module fresh against them; those imports are discarded afterwards.
+    """
+    stubs = {name: MagicMock(name=name) for name in SDK_MODULES}
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    for name in SDK_DEPENDENT_MODULES:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    
+    stubs["load"] = importlib.import_module
+    yield stubs
+    
+    for name in SDK_DEPENDENT_MODULES:
+        sys.modules.pop(name, None)
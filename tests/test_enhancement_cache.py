@@ -0,0 +1,26 @@
+"""
+Tests for llm.enhancement_cache - Two-tier enhancement cache
+"""
+import asyncio
+
+RESULT = {
+    "enhanced_query": "teacher transfer guidelines",
+    "search_terms": ["teacher transfer", "transfer guidelines"],
+    "reasoning": "Expanded with policy terms",
+    "confidence": 0.9
+}
+
+
+def test_exact_tier_does_not_share_search_terms(vertex_sdk):
+    enhancement_cache = vertex_sdk["load"]("llm.enhancement_cache")
+    cache = enhancement_cache.EnhancementCache()
+    result = {**RESULT, "search_terms": list(RESULT["search_terms"])}
+    
+    asyncio.run(cache.store("teacher transfers", "scope", result))
+    result["search_terms"].append("edited by caller")
+    
+    first, _ = asyncio.run(cache.lookup("teacher transfers", "scope"))
+    first["search_terms"].append("edited by first hit")
+    second, _ = asyncio.run(cache.lookup("teacher transfers", "scope"))
+    
+    assert second == RESULT
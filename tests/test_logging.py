@@ -0,0 +1,33 @@
+"""
+Tests for utils.logging - Structured formatting of lazy payloads
+"""
+import json
+import logging
+
+from utils.logging import StructuredFormatter, _LazyJSON
+
+
+def _format(msg: str, *args) -> dict:
+    record = logging.LogRecord("ap_policy_rag", logging.INFO, __file__, 1, msg, args, None)
+    return json.loads(StructuredFormatter().format(record))
+
+
+def test_lazy_payload_is_embedded_with_its_label():
+    line = _format("%s", _LazyJSON({"latency_ms": 12}, "Performance"))
+    
+    assert line["message"] == "Performance"
+    assert line["data"] == {"latency_ms": 12}
+
+
+def test_plain_messages_are_formatted_normally():
+    assert _format("Engines: %d of %d ready:", 2, 3)["message"] == "Engines: 2 of 3 ready:"
+    assert _format("Trailing space ")["message"] == "Trailing space "
+
+
+def test_lazy_payload_inside_other_messages_is_rendered_inline():
+    line = _format("[%s] %s", "req-1", _LazyJSON({"ok": True}, "Done"))
+    
+    prefix = "[req-1] Done: "
+    assert line["message"].startswith(prefix)
+    assert json.loads(line["message"][len(prefix):]) == {"ok": True}
+    assert "data" not in line
@@ -0,0 +1,50 @@
+"""
+Tests for router.planner - Memoized routing
+"""
+import time
+
+from router.planner import QueryPlanner
+
+QUERY = "What are the transfer rules for teachers under GO Ms No 45 in Krishna district for FY 2023-24?"
+
+
+def _best_of(fn, repeats: int = 5, number: int = 1000) -> float:
+    """Fastest of several timed batches, to damp scheduler noise"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_plans_do_not_share_state_with_cache():
+    planner = QueryPlanner()
+    first = planner.create_plan(QUERY)
+    engine = first["selected_engines"][0]
+    
+    first["selected_engines"].append("mutated")
+    first["engine_configs"][engine]["filters"]["mutated"] = True
+    first["features"]["facets"].append("mutated")
+    first["all_engine_scores"][engine] = -1.0
+    
+    second = planner.create_plan(QUERY)
+    assert "mutated" not in second["selected_engines"]
+    assert "mutated" not in second["engine_configs"][engine]["filters"]
+    assert "mutated" not in second["features"]["facets"]
+    assert second["all_engine_scores"][engine] >= 0.0
+    assert second["plan_id"] != first["plan_id"]
+
+
+def test_cache_hit_is_cheaper_than_routing():
+    cached_planner = QueryPlanner()
+    cached_planner.create_plan(QUERY)
+    
+    uncached_planner = QueryPlanner()
+    uncached_planner._route_cached = uncached_planner._route
+    
+    cached = _best_of(lambda: cached_planner.create_plan(QUERY))
+    uncached = _best_of(lambda: uncached_planner.create_plan(QUERY))
+    
+    assert cached < uncached
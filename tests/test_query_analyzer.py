@@ -0,0 +1,45 @@
+"""
+Tests for router.query_analyzer - Memoized analysis results
+"""
+import time
+
+from router.query_analyzer import QueryAnalyzer
+
+QUERY = "What are the transfer rules for teachers under GO Ms No 45 in Krishna district for FY 2023-24?"
+
+
+def _best_of(fn, repeats: int = 5, number: int = 2000) -> float:
+    """Fastest of several timed batches, to damp scheduler noise"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_analyze_results_do_not_share_state_with_cache():
+    analyzer = QueryAnalyzer()
+    first = analyzer.analyze(QUERY)
+    
+    first["facets"].append("mutated")
+    first["entities"]["go_numbers"].append("GO 1")
+    first["constraints"]["districts"].clear()
+    first["temporal"]["has_temporal"] = False
+    
+    second = analyzer.analyze(QUERY)
+    assert "mutated" not in second["facets"]
+    assert "GO 1" not in second["entities"]["go_numbers"]
+    assert second["constraints"]["districts"] == ["Krishna"]
+    assert second["temporal"]["has_temporal"] is True
+
+
+def test_cache_hit_is_cheaper_than_analysis():
+    analyzer = QueryAnalyzer()
+    analyzer.analyze(QUERY)
+    
+    cached = _best_of(lambda: analyzer.analyze(QUERY))
+    uncached = _best_of(lambda: analyzer._analyze(QUERY))
+    
+    assert cached < uncached
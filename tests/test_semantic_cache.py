@@ -0,0 +1,50 @@
+"""
+Tests for utils.semantic_cache - Persistence and dimension checks
+"""
+import numpy as np
+
+from utils.semantic_cache import SemanticCache
+
+
+def _vector(dim: int, seed: int = 0) -> list:
+    return np.random.default_rng(seed).normal(size=dim).tolist()
+
+
+def test_load_round_trips_matching_settings(tmp_path):
+    path = tmp_path / "cache.pkl"
+    cache = SemanticCache(threshold=0.9, max_entries=16, dim=8)
+    cache.put(_vector(8), {"count": 1})
+    cache.save(path)
+    
+    loaded = SemanticCache.load(path, threshold=0.9, max_entries=16, dim=8)
+    assert loaded is not None
+    assert loaded.get(_vector(8)) == {"count": 1}
+
+
+def test_load_discards_mismatched_settings(tmp_path):
+    path = tmp_path / "cache.pkl"
+    cache = SemanticCache(threshold=0.9, max_entries=16, dim=8)
+    cache.put(_vector(8), {"count": 1})
+    cache.save(path)
+    
+    assert SemanticCache.load(path, dim=16) is None
+    assert SemanticCache.load(path, threshold=0.95) is None
+
+
+def test_load_discards_other_format_versions(tmp_path):
+    path = tmp_path / "cache.pkl"
+    cache = SemanticCache(max_entries=16)
+    cache.version = SemanticCache.FORMAT_VERSION - 1
+    cache.save(path)
+    
+    assert SemanticCache.load(path) is None
+
+
+def test_dimension_mismatch_is_a_miss():
+    cache = SemanticCache(max_entries=16)
+    cache.put(_vector(8), {"count": 1})
+    
+    assert cache.get(_vector(16)) is None
+    cache.put(_vector(16), {"count": 2})
+    assert len(cache) == 1
+    assert cache.get(_vector(8)) == {"count": 1}
@@ -0,0 +1,29 @@
+"""
+Tests for llm.synth - Context-cached synthesis
+"""
+import asyncio
+
+CONFIG = {
+    "project": {"gcp_project_id": "test-project", "location": "us-central1"},
+    "models": {"llm": "gemini-2.5-flash"},
+    "synthesis": {
+        "citation_format": "[{doc_id}]",
+        "context_cache": {"enabled": True, "min_context_chars": 0}
+    }
+}
+
+DOCUMENTS = [{"id": "doc_1", "source_uri": "gs://bucket/go.pdf", "text": "Transfers happen in May.", "vertical": "gos"}]
+
+
+def test_cached_context_uses_preview_generative_model(vertex_sdk):
+    synth = vertex_sdk["load"]("llm.synth")
+    preview_model = vertex_sdk["vertexai.preview.generative_models"].GenerativeModel
+    ga_model = vertex_sdk["vertexai.generative_models"].GenerativeModel
+    cached_content = vertex_sdk["vertexai.preview.caching"].CachedContent.create.return_value
+    preview_model.from_cached_content.return_value.generate_content.return_value.text = "Transfers happen in May [doc_1]."
+    
+    asyncio.run(synth.synthesize_answer("When are transfers?", DOCUMENTS, {}, CONFIG))
+    
+    preview_model.from_cached_content.assert_called_once_with(cached_content=cached_content)
+    ga_model.from_cached_content.assert_not_called()
+    ga_model.assert_not_called()
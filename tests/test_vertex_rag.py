@@ -0,0 +1,36 @@
+"""
+Tests for rag_clients.vertex_rag - Batched retrieval
+"""
+import asyncio
+
+
+def test_batch_retrieve_duplicates_get_independent_results(vertex_sdk):
+    vertex_rag = vertex_sdk["load"]("rag_clients.vertex_rag")
+    calls = []
+    
+    async def search(engine_name, query, config, features=None, precomputed_embedding=None):
+        calls.append((engine_name, query))
+        return {
+            "engine": engine_name,
+            "documents": [{"id": "doc_1", "text": "Transfers happen in May.", "metadata": {"tags": ["go"]}}],
+            "count": 1,
+            "status": "success",
+            "timings": {"retrieve_ms": 5}
+        }
+    
+    client = object.__new__(vertex_rag.VertexRAGClient)
+    client.semantic_cache = None
+    client.search = search
+    
+    request = {"engine_name": "gos", "query": "teacher transfers", "config": {"top_k": 5}}
+    first, second = asyncio.run(vertex_rag.batch_retrieve(client, [request, dict(request)]))
+    
+    assert calls == [("gos", "teacher transfers")]
+    assert first == second
+    
+    first["documents"][0]["metadata"]["tags"].append("edited")
+    first["documents"].append({"id": "doc_2"})
+    first["timings"]["retrieve_ms"] = 0
+    
+    assert second["documents"] == [{"id": "doc_1", "text": "Transfers happen in May.", "metadata": {"tags": ["go"]}}]
+    assert second["timings"] == {"retrieve_ms": 5}
@@ -0,0 +1,145 @@
+"""
+io_uring log sink - Batched log file writes submitted through io_uring
+Used by setup_logger when LOG_SINK=file; falls back to logging.FileHandler
+where io_uring (Linux 5.1+) or the liburing bindings are unavailable
+"""
+from pathlib import Path
+import logging
+import os
+import platform
+import threading
+
+try:
+    import liburing
+    LIBURING_AVAILABLE = True
+except ImportError:
+    LIBURING_AVAILABLE = False
+    liburing = None
+
+# Records that trigger an immediate submission, and the longest a record waits
+BATCH_SIZE = 32
+FLUSH_INTERVAL_S = 0.010
+
+
+def _kernel_supports_uring() -> bool:
+    """io_uring needs Linux 5.1 or newer"""
+    if platform.system() != "Linux":
+        return False
+    
+    try:
+        major, minor = (int(part) for part in platform.release().split(".")[:2])
+    except ValueError:
+        return False
+    
+    return (major, minor) >= (5, 1)
+
+
+class UringFileHandler(logging.Handler):
+    """
+    Appends formatted records to a file via io_uring
+    
+    emit() only buffers the encoded line. A daemon thread joins the pending
+    lines and submits them as a single write SQE every FLUSH_INTERVAL_S, or as
+    soon as BATCH_SIZE records are waiting.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_S
+    ):
+        super().__init__()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._offset = os.fstat(self._fd).st_size
+        
+        self._ring = liburing.io_uring()
+        self._cqe = liburing.io_uring_cqe()
+        liburing.io_uring_queue_init(batch_size, self._ring, 0)
+        
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        
+        self._thread = threading.Thread(target=self._run, name="uring_log_sink", daemon=True)
+        self._thread.start()
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            data = (self.format(record) + "\n").encode("utf-8")
+        except Exception:
+            self.handleError(record)
+            return
+        
+        with self._pending_lock:
+            self._pending.append(data)
+            full = len(self._pending) >= self.batch_size
+        
+        if full:
+            self._wakeup.set()
+    
+    def flush(self) -> None:
+        self._wakeup.set()
+    
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._wakeup.set()
+            self._thread.join()
+            self._write_pending()
+            liburing.io_uring_queue_exit(self._ring)
+            os.close(self._fd)
+        super().close()
+    
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write_pending()
+    
+    def _write_pending(self) -> None:
+        """Submit everything pending as one write and wait for its completion"""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        
+        if not batch:
+            return
+        
+        buf = b"".join(batch)
+        
+        with self._write_lock:
+            try:
+                sqe = liburing.io_uring_get_sqe(self._ring)
+                liburing.io_uring_prep_write(sqe, self._fd, buf, len(buf), self._offset)
+                liburing.io_uring_submit(self._ring)
+                liburing.io_uring_wait_cqe(self._ring, self._cqe)
+                written = self._cqe.res
+                liburing.io_uring_cqe_seen(self._ring, self._cqe)
+            except Exception:
+                written = -1
+            
+            # Errors and short writes finish with a plain write so no lines are lost
+            if written < len(buf):
+                os.write(self._fd, buf[max(written, 0):])
+            
+            self._offset += len(buf)
+
+
+def make_file_handler(path: Path) -> logging.Handler:
+    """io_uring-backed file handler where supported, else a logging.FileHandler"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    if LIBURING_AVAILABLE and _kernel_supports_uring():
+        try:
+            return UringFileHandler(path)
+        except Exception:
+            # e.g. io_uring disabled by seccomp or kernel.io_uring_disabled
+            pass
+    
+    return logging.FileHandler(path, encoding="utf-8")
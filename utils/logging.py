@@ -1,46 +1,183 @@
 """
 Logging utility - Structured logging for the AP Policy Reasoning system
 """
+import atexit
+import copy
 import logging
 import json
+import os
+import queue
 import sys
-from datetime import datetime
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, Optional
-from functools import lru_cache
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    def _dumps(obj: Any) -> str:
+        """Serialize to a JSON string (orjson)"""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+else:
+    _dumps = json.dumps
+
+# Record attributes copied into structured log lines when present
+_EXTRA_KEYS = ("request_id", "plan_id", "engine", "trace_id")
+
+# Per-task log context (e.g. the current request_id), injected into every record
+_LOG_CTX: ContextVar[Dict[str, Any]] = ContextVar("log_ctx", default={})
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp, replaced
+# as one tuple so concurrent readers never pair a second with another's prefix
+_iso_second_cache = (-1, "")
+
+
+class _LazyJSON:
+    """
+    Log argument that is only serialized if a handler renders the message
+    
+    Logged as `logger.info("%s", _LazyJSON(obj, label))`: text handlers see
+    "label: {json}", the structured formatter emits label and obj separately.
+    """
+    
+    __slots__ = ("obj", "label")
+    
+    def __init__(self, obj: Any, label: str):
+        self.obj = obj
+        self.label = label
+    
+    def __str__(self) -> str:
+        return f"{self.label}: {_dumps(self.obj)}"
+
+
+def _lazy_payload(record: logging.LogRecord) -> Optional[_LazyJSON]:
+    """The record's _LazyJSON argument, if it was logged as `"%s" % lazy`"""
+    args = record.args
+    if (
+        record.msg == "%s" and isinstance(args, tuple)
+        and len(args) == 1 and type(args[0]) is _LazyJSON
+    ):
+        return args[0]
+    return None
+
+
+def format_iso_timestamp(t: float) -> str:
+    """
+    Format an epoch timestamp as UTC ISO-8601 with microseconds
+    
+    The date/time prefix is only rebuilt when the second changes.
+    """
+    global _iso_second_cache
+    second = int(t)
+    cached_second, prefix = _iso_second_cache
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _iso_second_cache = (second, prefix)
+    return "%s.%06dZ" % (prefix, int((t - second) * 1e6))
 
 
 class StructuredFormatter(logging.Formatter):
     """JSON formatter for structured logging"""
     
+    converter = time.gmtime
+    
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": format_iso_timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
-            "message": record.getMessage(),
+            "message": None,
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno
         }
         
-        # Add extra fields
-        if hasattr(record, 'request_id'):
-            log_data["request_id"] = record.request_id
-        
-        if hasattr(record, 'plan_id'):
-            log_data["plan_id"] = record.plan_id
+        # Structured payloads are embedded as JSON objects rather than
+        # serialized into the message string and escaped a second time
+        payload = _lazy_payload(record)
+        if payload is not None:
+            log_data["message"] = payload.label
+            log_data["data"] = payload.obj
+        else:
+            log_data["message"] = record.getMessage()
         
-        if hasattr(record, 'engine'):
-            log_data["engine"] = record.engine
+        # Add extra fields
+        fields = record.__dict__
+        for key in _EXTRA_KEYS:
+            value = fields.get(key)
+            if value is not None:
+                log_data[key] = value
         
         # Add exception info if present
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
         
-        return json.dumps(log_data)
+        return _dumps(log_data)
+
+
+class _CtxFilter(logging.Filter):
+    """Copies the _LOG_CTX fields onto each record (explicit extra= wins)"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = _LOG_CTX.get()
+        if ctx:
+            fields = record.__dict__
+            for key, value in ctx.items():
+                fields.setdefault(key, value)
+        return True
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that writes without flushing; the listener flushes per batch"""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves JSON formatting to the listener thread
+    
+    Only the message is rendered up front, so later mutation of the log
+    arguments can't change what gets logged; exc_info is kept for the formatter.
+    _LazyJSON payloads are passed through unserialized (callers hand over
+    dicts they no longer mutate).
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if _lazy_payload(record) is None:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers whenever the queue drains"""
+    
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.flush()
+            return self.queue.get(block)
+    
+    def stop(self) -> None:
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
 
 
-@lru_cache(maxsize=1)
 def setup_logger(name: str = "ap_policy_rag") -> logging.Logger:
     """
     Set up the main logger with structured formatting
@@ -53,14 +190,19 @@ def setup_logger(name: str = "ap_policy_rag") -> logging.Logger:
     """
     logger = logging.getLogger(name)
     
-    # Avoid duplicate handlers
+    # Avoid duplicate handlers (makes repeated calls idempotent per name)
     if logger.handlers:
         return logger
     
     logger.setLevel(logging.INFO)
     
-    # Console handler with structured JSON
-    handler = logging.StreamHandler(sys.stdout)
+    # Structured JSON written by a background listener: to stdout, or with
+    # LOG_SINK=file to LOG_FILE through the batched io_uring sink
+    if os.environ.get("LOG_SINK") == "file":
+        from utils._uring_sink import make_file_handler
+        handler = make_file_handler(os.environ.get("LOG_FILE", "logs/ap_policy_rag.jsonl"))
+    else:
+        handler = _BufferedStreamHandler(sys.stdout)
     handler.setLevel(logging.INFO)
     
     # Use JSON formatter for structured logs
@@ -76,7 +218,17 @@ def setup_logger(name: str = "ap_policy_rag") -> logging.Logger:
             )
         )
     
-    logger.addHandler(handler)
+    # emit() on the request path is just a queue put
+    log_queue = queue.SimpleQueue()
+    listener = _BatchingQueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    
+    # Logger filters run on the thread making the log call, the only place the
+    # caller's ContextVar is visible; do not move this to the queue listener
+    logger.addFilter(_CtxFilter())
     
     # Prevent propagation to root logger
     logger.propagate = False
@@ -102,6 +254,9 @@ async def log_request(
     """
     logger = get_logger()
     
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     log_entry = {
         "request_id": request_id,
         "query": query,
@@ -111,14 +266,15 @@ async def log_request(
         "used_engines": response.used_engines if hasattr(response, 'used_engines') else [],
         "confidence": response.confidence if hasattr(response, 'confidence') else 0.0,
         "processing_time_ms": response.processing_time_ms if hasattr(response, 'processing_time_ms') else 0,
-        "timestamp": response.timestamp if hasattr(response, 'timestamp') else datetime.utcnow().isoformat()
+        "timestamp": response.timestamp if hasattr(response, 'timestamp') else format_iso_timestamp(time.time())
     }
     
-    # Add trace info
+    # Add trace info (callers pass utils.tracing.to_json(trace_ctx))
     if trace:
         log_entry["trace"] = trace
     
-    logger.info(f"Request completed: {json.dumps(log_entry)}")
+    # Serialized by the log listener thread, never on the event loop
+    logger.info("%s", _LazyJSON(log_entry, "Request completed"))
 
 
 def log_performance_metrics(
@@ -129,17 +285,20 @@ def log_performance_metrics(
     """Log performance metrics for monitoring"""
     logger = get_logger()
     
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     metrics = {
         "metric_type": "performance",
         "operation": operation,
         "duration_ms": duration_ms,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": format_iso_timestamp(time.time())
     }
     
     if metadata:
         metrics.update(metadata)
     
-    logger.info(f"Performance: {json.dumps(metrics)}")
+    logger.info("%s", _LazyJSON(metrics, "Performance"))
 
 
 def log_error(
@@ -150,17 +309,20 @@ def log_error(
     """Log errors with context"""
     logger = get_logger()
     
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    
     error_log = {
         "event_type": "error",
         "error_type": error_type,
         "error_message": error_message,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": format_iso_timestamp(time.time())
     }
     
     if context:
         error_log["context"] = context
     
-    logger.error(f"Error: {json.dumps(error_log)}")
+    logger.error("%s", _LazyJSON(error_log, "Error"))
 
 
 class RequestLogger:
@@ -171,29 +333,25 @@ class RequestLogger:
         self.operation = operation
         self.logger = get_logger()
         self.start_time = None
+        self._ctx_token = None
     
     def __enter__(self):
-        self.start_time = datetime.utcnow()
-        self.logger.info(
-            f"Starting {self.operation}",
-            extra={"request_id": self.request_id}
-        )
+        self.start_time = time.perf_counter()
+        
+        # Every log line inside the block carries this request_id
+        self._ctx_token = _LOG_CTX.set({**_LOG_CTX.get(), "request_id": self.request_id})
+        self.logger.info(f"Starting {self.operation}")
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = (datetime.utcnow() - self.start_time).total_seconds() * 1000
+        duration = (time.perf_counter() - self.start_time) * 1000
         
         if exc_type is None:
-            self.logger.info(
-                f"Completed {self.operation} in {duration:.0f}ms",
-                extra={"request_id": self.request_id}
-            )
+            self.logger.info(f"Completed {self.operation} in {duration:.0f}ms")
         else:
-            self.logger.error(
-                f"Failed {self.operation} after {duration:.0f}ms: {exc_val}",
-                extra={"request_id": self.request_id}
-            )
+            self.logger.error(f"Failed {self.operation} after {duration:.0f}ms: {exc_val}")
         
+        _LOG_CTX.reset(self._ctx_token)
         return False  # Don't suppress exceptions
 
 
@@ -217,5 +375,4 @@ if __name__ == "__main__":
     
     # Test context manager
     with RequestLogger("test-request", "test_operation"):
-        import time
         time.sleep(0.1)
\ No newline at end of file
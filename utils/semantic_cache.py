@@ -0,0 +1,254 @@
+"""
+Semantic cache utility - Nearest-neighbour cache keyed by query embeddings
+Near-duplicate queries (cosine similarity above a threshold) reuse a cached result
+"""
+from typing import Any, Dict, Hashable, Optional, Sequence, Set, Tuple
+from pathlib import Path
+import os
+import pickle
+import time
+import numpy as np
+
+from utils.logging import get_logger
+
+logger = get_logger()
+
+
+class SemanticCache:
+    """
+    Embedding-keyed result cache with int8-quantized vectors
+    
+    Vectors are L2-normalized and stored as int8 codes with a per-vector
+    absmax scale (SQ8), a quarter of the float32 footprint. Cosine similarity
+    is computed as an int8 dot product rescaled by both vectors' scales.
+    Entries live in a fixed-size ring buffer and expire after ttl_seconds.
+    
+    With lsh_tables > 0, lookups only score the entries that share a
+    random-hyperplane (SimHash) bucket with the query in at least one table,
+    instead of scanning the whole buffer.
+    """
+    
+    # Bumped whenever the pickled layout changes; load() discards other versions
+    FORMAT_VERSION = 2
+    
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600,
+        lsh_tables: int = 8,
+        lsh_bits: int = 8,
+        dim: Optional[int] = None
+    ):
+        """
+        Args:
+            dim: Embedding size; taken from the first put when None. Vectors of
+                any other size are treated as misses and not stored.
+        """
+        self.version = self.FORMAT_VERSION
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        self.dim = dim
+        
+        # Hyperplanes are drawn on first put, once the embedding size is known
+        self._planes: Optional[np.ndarray] = None
+        self._bit_weights = 1 << np.arange(lsh_bits, dtype=np.int64)
+        self._buckets: list = [{} for _ in range(lsh_tables)]
+        self._slot_keys: list = [None] * max_entries
+        
+        # Code matrix is allocated on first put, once the embedding size is known
+        self._codes: Optional[np.ndarray] = None
+        self._scales = np.zeros(max_entries, dtype=np.float32)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._scope_ids = np.zeros(max_entries, dtype=np.int32)
+        self._values: list = [None] * max_entries
+        self._scope_index: Dict[Hashable, int] = {}
+        
+        self._size = 0
+        self._next = 0  # Ring buffer write position
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def quantize(vector: Sequence[float]) -> Tuple[np.ndarray, float]:
+        """L2-normalize a vector and quantize it to int8 codes with an absmax scale"""
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        
+        if norm == 0.0:
+            return np.zeros(vec.shape[0], dtype=np.int8), 0.0
+        
+        vec = vec / norm
+        scale = float(np.abs(vec).max()) / 127.0
+        codes = np.round(vec / scale).astype(np.int8)
+        
+        return codes, scale
+    
+    def get(self, vector: Sequence[float], scope: Hashable = None) -> Optional[Any]:
+        """
+        Look up the most similar cached entry within the same scope
+        
+        Returns the cached value if its similarity clears the threshold, else None
+        """
+        scope_id = self._scope_index.get(scope)
+        
+        # A vector from a different embedding model cannot be compared; treat as a miss
+        if self._size == 0 or scope_id is None or len(vector) != self.dim:
+            self.misses += 1
+            return None
+        
+        codes, scale = self.quantize(vector)
+        
+        if self.lsh_tables:
+            candidates = self._candidates(vector)
+            if not candidates:
+                self.misses += 1
+                return None
+            slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        else:
+            slots = np.arange(self._size)
+        
+        # int8 dot products accumulated in int32, then rescaled to cosine similarity
+        dots = np.einsum("ij,j->i", self._codes[slots], codes, dtype=np.int32)
+        similarities = dots * self._scales[slots] * scale
+        
+        valid = (self._scope_ids[slots] == scope_id) & (self._expires_at[slots] > time.time())
+        similarities = np.where(valid, similarities, -1.0)
+        
+        best = int(np.argmax(similarities))
+        
+        if similarities[best] >= self.threshold:
+            self.hits += 1
+            return self._values[int(slots[best])]
+        
+        self.misses += 1
+        return None
+    
+    def put(self, vector: Sequence[float], value: Any, scope: Hashable = None) -> None:
+        """Insert an entry, overwriting the oldest slot once the cache is full"""
+        codes, scale = self.quantize(vector)
+        
+        if self.dim is None:
+            self.dim = codes.shape[0]
+        elif codes.shape[0] != self.dim:
+            logger.warning(
+                f"Semantic cache expects {self.dim}-d vectors, not storing a {codes.shape[0]}-d one"
+            )
+            return
+        
+        if self._codes is None:
+            self._codes = np.zeros((self.max_entries, self.dim), dtype=np.int8)
+            if self.lsh_tables:
+                rng = np.random.default_rng()
+                self._planes = rng.standard_normal(
+                    (self.lsh_tables * self.lsh_bits, self.dim)
+                ).astype(np.float32)
+        
+        if scope not in self._scope_index:
+            self._scope_index[scope] = len(self._scope_index)
+        
+        slot = self._next
+        
+        if self.lsh_tables:
+            # Evict the overwritten entry from its buckets, then index the new one
+            old_keys = self._slot_keys[slot]
+            if old_keys is not None:
+                for table, key in zip(self._buckets, old_keys):
+                    table[key].discard(slot)
+            
+            keys = self._hash(vector)
+            for table, key in zip(self._buckets, keys):
+                table.setdefault(key, set()).add(slot)
+            self._slot_keys[slot] = keys
+        
+        self._codes[slot] = codes
+        self._scales[slot] = scale
+        self._expires_at[slot] = time.time() + self.ttl_seconds
+        self._scope_ids[slot] = self._scope_index[scope]
+        self._values[slot] = value
+        
+        self._next = (slot + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+    
+    def _hash(self, vector: Sequence[float]) -> Tuple[int, ...]:
+        """One SimHash bucket key per table: the sign pattern of lsh_bits hyperplane projections"""
+        projections = self._planes @ np.asarray(vector, dtype=np.float32)
+        bits = (projections > 0).reshape(self.lsh_tables, self.lsh_bits)
+        return tuple(int(k) for k in bits @ self._bit_weights)
+    
+    def _candidates(self, vector: Sequence[float]) -> Set[int]:
+        """Slots sharing a bucket with the vector in any table"""
+        candidates: Set[int] = set()
+        for table, key in zip(self._buckets, self._hash(vector)):
+            bucket = table.get(key)
+            if bucket:
+                candidates |= bucket
+        return candidates
+    
+    def save(self, path: Path) -> None:
+        """Pickle the cache to disk (temp file + rename) so it survives restarts"""
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning(f"Could not persist semantic cache to {path}: {e}")
+    
+    @classmethod
+    def load(cls, path: Path, **expected: Any) -> Optional["SemanticCache"]:
+        """
+        Load a cache saved with save()
+        
+        Returns None if the file is missing, unreadable, from another format
+        version, or saved with settings that differ from `expected` (e.g.
+        threshold=0.95, dim=768; None values are not checked). Expired entries
+        are never served, since expiry is stored as wall-clock time.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        
+        try:
+            with open(path, "rb") as f:
+                cache = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache from {path}: {e}")
+            return None
+        
+        if not isinstance(cache, cls) or getattr(cache, "version", None) != cls.FORMAT_VERSION:
+            logger.warning(f"Discarding semantic cache {path}: saved by an incompatible version")
+            return None
+        
+        mismatched = [
+            key for key, value in expected.items()
+            if value is not None and getattr(cache, key, None) != value
+        ]
+        if mismatched:
+            logger.warning(
+                f"Discarding semantic cache {path}: saved with different {', '.join(mismatched)}"
+            )
+            return None
+        
+        cache.hits = 0
+        cache.misses = 0
+        return cache
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
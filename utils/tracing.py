@@ -3,8 +3,24 @@ Tracing utility - Distributed tracing for request flow
 Tracks request progression through the LangGraph pipeline
 """
 from typing import Dict, Any, Optional
-from datetime import datetime
-import uuid
+import os
+import random
+import time
+
+from utils.logging import format_iso_timestamp
+
+# Trace/span ids only need to be unique, not unpredictable: a seeded PRNG avoids
+# an os.urandom syscall and a UUID object per span
+_rng = random.Random(os.urandom(32))
+
+# Forked workers would otherwise generate the same id sequence (no fork on Windows)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: _rng.seed(os.urandom(32)))
+
+
+def _short_id() -> str:
+    """Random 128-bit id as 32 hex characters"""
+    return _rng.getrandbits(128).to_bytes(16, "big").hex()
 
 
 def create_trace_context(request_id: str) -> Dict[str, Any]:
@@ -19,74 +35,78 @@ def create_trace_context(request_id: str) -> Dict[str, Any]:
     """
     return {
         "request_id": request_id,
-        "trace_id": str(uuid.uuid4()),
-        "start_time": datetime.utcnow().isoformat(),
-        "spans": []
+        "trace_id": _short_id(),
+        "start_time": time.time(),
+        "spans": [],
+        "spans_by_id": {}
     }
 
 
 class Span:
-    """Represents a traced operation span"""
+    """
+    Represents a traced operation span
+    
+    Times are stored as epoch seconds (start_time/end_time) and durations are
+    measured with perf_counter_ns; use to_json() for ISO timestamps.
+    """
     
     def __init__(self, trace_ctx: Dict[str, Any], name: str, metadata: Optional[Dict[str, Any]] = None):
         self.trace_ctx = trace_ctx
-        self.span_id = str(uuid.uuid4())
+        self.span_id = _short_id()
         self.name = name
         self.metadata = metadata or {}
-        self.start_time = datetime.utcnow()
+        self.start_ns = time.perf_counter_ns()
+        self.start_wall = time.time()
         self.end_time = None
         self.duration_ms = None
         self.status = "pending"
         self.error = None
+        self._span_data = None
     
     def __enter__(self):
         """Start the span"""
         span_data = {
             "span_id": self.span_id,
             "name": self.name,
-            "start_time": self.start_time.isoformat(),
+            "start_time": self.start_wall,
             "metadata": self.metadata
         }
         self.trace_ctx["spans"].append(span_data)
+        self.trace_ctx.setdefault("spans_by_id", {})[self.span_id] = span_data
+        self._span_data = span_data
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """End the span"""
-        self.end_time = datetime.utcnow()
-        self.duration_ms = int((self.end_time - self.start_time).total_seconds() * 1000)
+        elapsed_ns = time.perf_counter_ns() - self.start_ns
+        self.duration_ms = elapsed_ns // 1_000_000
+        self.end_time = self.start_wall + elapsed_ns / 1e9
         
-        # Update span in trace context
-        for span in self.trace_ctx["spans"]:
-            if span["span_id"] == self.span_id:
-                span["end_time"] = self.end_time.isoformat()
-                span["duration_ms"] = self.duration_ms
-                
-                if exc_type is None:
-                    span["status"] = "success"
-                else:
-                    span["status"] = "error"
-                    span["error"] = {
-                        "type": exc_type.__name__,
-                        "message": str(exc_val)
-                    }
-                break
+        # Update span in trace context (same dict as in trace_ctx["spans"])
+        span = self._span_data
+        span["end_time"] = self.end_time
+        span["duration_ms"] = self.duration_ms
+        
+        if exc_type is None:
+            span["status"] = "success"
+        else:
+            span["status"] = "error"
+            span["error"] = {
+                "type": exc_type.__name__,
+                "message": str(exc_val)
+            }
         
         return False  # Don't suppress exceptions
     
     def add_event(self, event: str, data: Optional[Dict[str, Any]] = None):
         """Add an event to the span"""
         event_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time.time(),
             "event": event,
             "data": data or {}
         }
         
-        for span in self.trace_ctx["spans"]:
-            if span["span_id"] == self.span_id:
-                if "events" not in span:
-                    span["events"] = []
-                span["events"].append(event_data)
-                break
+        self._span_data.setdefault("events", []).append(event_data)
 
 
 def get_trace_summary(trace_ctx: Dict[str, Any]) -> Dict[str, Any]:
@@ -104,27 +124,36 @@ def get_trace_summary(trace_ctx: Dict[str, Any]) -> Dict[str, Any]:
     
     spans = trace_ctx["spans"]
     
-    # Calculate total time
-    start_times = [span["start_time"] for span in spans if "start_time" in span]
-    end_times = [span["end_time"] for span in spans if "end_time" in span]
-    
-    if not start_times or not end_times:
-        total_duration = 0
-    else:
-        start = datetime.fromisoformat(min(start_times))
-        end = datetime.fromisoformat(max(end_times))
-        total_duration = int((end - start).total_seconds() * 1000)
-    
-    # Count status
-    success_count = sum(1 for span in spans if span.get("status") == "success")
-    error_count = sum(1 for span in spans if span.get("status") == "error")
-    
-    # Get span timings
+    # One pass for the time range, status counts and timings
+    first_start = None
+    last_end = None
+    success_count = 0
+    error_count = 0
     span_timings = {}
+    
     for span in spans:
+        start_time = span.get("start_time")
+        if start_time is not None and (first_start is None or start_time < first_start):
+            first_start = start_time
+        
+        end_time = span.get("end_time")
+        if end_time is not None and (last_end is None or end_time > last_end):
+            last_end = end_time
+        
+        status = span.get("status")
+        if status == "success":
+            success_count += 1
+        elif status == "error":
+            error_count += 1
+        
         if "duration_ms" in span:
             span_timings[span["name"]] = span["duration_ms"]
     
+    if first_start is None or last_end is None:
+        total_duration = 0
+    else:
+        total_duration = int((last_end - first_start) * 1000)
+    
     return {
         "request_id": trace_ctx.get("request_id"),
         "trace_id": trace_ctx.get("trace_id"),
@@ -137,6 +166,36 @@ def get_trace_summary(trace_ctx: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def to_json(trace_ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON-ready copy of a trace context for logging
+    
+    Epoch times become ISO-8601 strings and the spans_by_id index is dropped
+    (it holds the same span dicts as spans).
+    """
+    if not trace_ctx:
+        return {}
+    
+    spans = []
+    for span in trace_ctx.get("spans", []):
+        span = dict(span)
+        span["start_time"] = format_iso_timestamp(span["start_time"])
+        if "end_time" in span:
+            span["end_time"] = format_iso_timestamp(span["end_time"])
+        if "events" in span:
+            span["events"] = [
+                {**event, "timestamp": format_iso_timestamp(event["timestamp"])}
+                for event in span["events"]
+            ]
+        spans.append(span)
+    
+    result = {k: v for k, v in trace_ctx.items() if k not in ("spans", "spans_by_id")}
+    if "start_time" in result:
+        result["start_time"] = format_iso_timestamp(result["start_time"])
+    result["spans"] = spans
+    return result
+
+
 def format_trace_tree(trace_ctx: Dict[str, Any]) -> str:
     """
     Format trace as a tree for debugging
@@ -172,8 +231,6 @@ def format_trace_tree(trace_ctx: Dict[str, Any]) -> str:
 
 if __name__ == "__main__":
     # Test tracing
-    import time
-    
     trace_ctx = create_trace_context("test-request-123")
     
     with Span(trace_ctx, "analyze_query", {"query_length": 50}):